@@ -0,0 +1,143 @@
+# app/analytics.py
+"""
+Monthly application stats, served from the `application_monthly_stats` rollup.
+
+Each application counts once under (user, month it was created in UTC, current
+status). Write paths in the applications router call `apply_deltas` inside
+their own transaction, so the rollup commits (or rolls back) with the change.
+
+    python -m app.analytics rebuild [--user USER_ID]   # full backfill
+    python -m app.analytics check                      # exit 1 on drift
+"""
+import argparse, sys
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Iterable
+
+from sqlalchemy import Date, delete, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import dialect_insert
+from app.models import Application, ApplicationMonthlyStat as Stat
+
+DEFAULT_STATUS = "applied"
+
+Deltas = Counter  # (month, status) -> +/- count
+
+
+def month_of(ts: datetime | None) -> date:
+    ts = ts or datetime.now(timezone.utc)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    return date(ts.year, ts.month, 1)
+
+
+def deltas_for(rows: Iterable, sign: int = 1) -> Deltas:
+    """Deltas for rows exposing `created_at` and `status` (ORM objects or Row tuples)."""
+    deltas: Deltas = Counter()
+    for row in rows:
+        deltas[(month_of(row.created_at), row.status or DEFAULT_STATUS)] += sign
+    return deltas
+
+
+def status_change(created_at: datetime | None, old: str | None, new: str | None) -> Deltas:
+    old, new = old or DEFAULT_STATUS, new or DEFAULT_STATUS
+    if old == new:
+        return Counter()
+    month = month_of(created_at)
+    return Counter({(month, old): -1, (month, new): 1})
+
+
+async def apply_deltas(db: AsyncSession, user_id: str, deltas: Deltas) -> None:
+    """Upsert count += delta for each (month, status); caller commits."""
+    values = [
+        {"user_id": user_id, "month": month, "status": status, "count": n}
+        for (month, status), n in deltas.items() if n
+    ]
+    if not values:
+        return
+    ins = dialect_insert(db.bind.dialect.name)
+    if ins is None:
+        raise RuntimeError("Monthly stats rollup needs Postgres or SQLite")
+    stmt = ins(Stat).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Stat.user_id, Stat.month, Stat.status],
+        set_={"count": Stat.count + stmt.excluded.count},
+    )
+    await db.execute(stmt)
+
+
+# -------------------- Full rebuild / consistency check --------------------
+def _month_expr(dialect: str):
+    if dialect == "postgresql":
+        return func.date_trunc("month", func.timezone("UTC", Application.created_at)).cast(Date)
+    return func.date(Application.created_at, "start of month")
+
+
+def _recomputed(conn: Connection, user_id: str | None = None):
+    month = _month_expr(conn.dialect.name)
+    status = func.coalesce(Application.status, DEFAULT_STATUS)
+    sel = (
+        select(Application.user_id, month.label("month"), status.label("status"), func.count().label("count"))
+        .group_by(Application.user_id, month, status)
+    )
+    if user_id:
+        sel = sel.where(Application.user_id == user_id)
+    return sel
+
+
+def rebuild(conn: Connection, user_id: str | None = None) -> int:
+    """Recompute the rollup from `application` (one user or everyone); returns rows written."""
+    wipe = delete(Stat)
+    if user_id:
+        wipe = wipe.where(Stat.user_id == user_id)
+    conn.execute(wipe)
+    result = conn.execute(
+        insert(Stat).from_select(["user_id", "month", "status", "count"], _recomputed(conn, user_id))
+    )
+    return result.rowcount
+
+
+def check(conn: Connection) -> list[tuple]:
+    """(user_id, month, status, rollup count, actual count) for every mismatch."""
+    def key(row):
+        return (str(row.user_id), str(row.month), row.status)
+
+    actual = {key(r): r.count for r in conn.execute(_recomputed(conn))}
+    stored = {key(r): r.count for r in conn.execute(select(Stat)) if r.count}
+    return [
+        (*k, stored.get(k, 0), actual.get(k, 0))
+        for k in sorted(set(actual) | set(stored))
+        if stored.get(k, 0) != actual.get(k, 0)
+    ]
+
+
+def main() -> None:
+    from app.db import engine
+    from app.migrations import migrate
+
+    parser = argparse.ArgumentParser(description="Maintain the monthly application stats rollup.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_rebuild = sub.add_parser("rebuild", help="recompute the rollup from scratch")
+    p_rebuild.add_argument("--user", help="only this user_id")
+    sub.add_parser("check", help="compare the rollup with a fresh aggregate")
+    args = parser.parse_args()
+
+    migrate(engine)
+    if args.command == "rebuild":
+        with engine.begin() as conn:
+            n = rebuild(conn, args.user)
+        print(f"Rebuilt {n} rollup row(s).")
+        return
+
+    with engine.connect() as conn:
+        drift = check(conn)
+    for user_id, month, status, stored, actual in drift:
+        print(f"{user_id} {month} {status}: rollup={stored} actual={actual}")
+    print(f"{len(drift)} mismatched row(s).")
+    sys.exit(1 if drift else 0)
+
+
+if __name__ == "__main__":
+    main()
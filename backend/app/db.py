@@ -1,12 +1,16 @@
 # app/db.py
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from functools import lru_cache
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Load environment variables from .env file
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
+from app import metrics  # reads its settings from the environment loaded above
+
 # Get the DATABASE_URL from the environment
 DATABASE_URL = os.getenv("DATABASE_URL")
 POOL_SIZE = int(os.getenv("POOL_SIZE", "5"))
@@ -16,12 +20,74 @@ MAX_OVERFLOW = int(os.getenv("MAX_OVERFLOW", "5"))
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set. Please check your .env file.")
 
-# Create SQLAlchemy engine and session
+# SQLite (tests) uses SQLAlchemy's default single-file pools, which take no sizing args
+_pool_kwargs = {} if DATABASE_URL.startswith("sqlite") else {
+    "pool_size": POOL_SIZE,
+    "max_overflow": MAX_OVERFLOW,
+}
+_pooled = bool(_pool_kwargs)
+
+# Create SQLAlchemy engine and session (sync path: migrations, scripts, users router)
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=POOL_SIZE,
-    max_overflow=MAX_OVERFLOW,
+    **({"poolclass": metrics.TimedQueuePool} if _pooled else {}),
+    **_pool_kwargs,
 )
+metrics.instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _sqlite_foreign_keys(dbapi_conn, _record):
+    """SQLite ignores ON DELETE CASCADE/SET NULL unless asked per connection."""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _sqlite_foreign_keys)
 Base = declarative_base()
+
+def dialect_insert(dialect: str):
+    """The dialect's `insert` construct (supports ON CONFLICT), or None if unsupported."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+# ---- Async path (applications / notes / files routers) ----
+# Derived from DATABASE_URL unless ASYNC_DATABASE_URL is set:
+#   postgresql[+psycopg2]://...  ->  postgresql+asyncpg://...
+#   sqlite:///...                ->  sqlite+aiosqlite:///...
+# The routers and auth only run on this path, so a SQLite setup needs aiosqlite
+# (in requirements.txt) as much as Postgres needs asyncpg.
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def _async_url(url: str) -> str:
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r}; set ASYNC_DATABASE_URL")
+    if "sslmode" in u.query:  # libpq spelling; asyncpg calls it `ssl`
+        u = u.update_query_dict({"ssl": u.query["sslmode"]}).difference_update_query(["sslmode"])
+    return u.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+@lru_cache(maxsize=1)
+def async_session_factory():
+    """Async engine + session factory, created on first use (keeps asyncpg off cold starts)."""
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_pre_ping=True,
+        **({"poolclass": metrics.TimedAsyncQueuePool} if _pooled else {}),
+        **_pool_kwargs,
+    )
+    metrics.instrument_engine(async_engine.sync_engine)
+    if async_engine.dialect.name == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", _sqlite_foreign_keys)
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
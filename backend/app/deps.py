@@ -1,14 +1,19 @@
 # app/deps.py
-import os, json, urllib.request
+import os, hashlib, time
+from dataclasses import dataclass
+from datetime import datetime
 from functools import lru_cache
 from typing import Optional
 
 from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import SessionLocal
+from app.cache import TTLCache
+from app.db import SessionLocal, async_session_factory, dialect_insert
+from app.migrations import ensure_migrated, ensure_migrated_async
 from app.models import User
 
 # ---- Modes ----
@@ -25,30 +30,132 @@ JWKS_URL         = f"{COGNITO_ISSUER}/.well-known/jwks.json" if COGNITO_ISSUER e
 
 security = HTTPBearer()  # 401 automatically if missing
 
-# ---- DB dependency ----
+# ---- Principal cache ----
+# subject -> Principal, so an authenticated request doesn't need a users lookup.
+# Keys are ("uid", user_id) in dev-noverify mode and ("sub", cognito_sub) otherwise.
+PRINCIPAL_CACHE_TTL  = float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+_principals = TTLCache("principals", maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+@dataclass(frozen=True)
+class Principal:
+    """Detached snapshot of the authenticated users row (same attribute names as User)."""
+    user_id: str
+    email: str
+    premium: bool
+    created_at: datetime
+    cognito_sub: Optional[str]
+
+_PRINCIPAL_COLS = (User.user_id, User.email, User.premium, User.created_at, User.cognito_sub)
+
+def _principal(row) -> Principal:
+    return Principal(
+        user_id=row.user_id, email=row.email, premium=bool(row.premium),
+        created_at=row.created_at, cognito_sub=row.cognito_sub,
+    )
+
+def _cache_principal(key: tuple, principal: Principal) -> Principal:
+    _principals.set(key, principal)
+    return principal
+
+def invalidate_principal(user) -> None:
+    """Forget a user (e.g. after account deletion) under every key it may be cached by."""
+    _principals.pop(("uid", user.user_id))
+    if user.cognito_sub:
+        _principals.pop(("sub", user.cognito_sub))
+
+async def _upsert_cognito_user(db: AsyncSession, sub: str, email: Optional[str]) -> Principal:
+    """Race-free first-login create: INSERT ... ON CONFLICT (cognito_sub) ... RETURNING."""
+    insert = dialect_insert(db.bind.dialect.name)
+    if insert is None:
+        user = (await db.execute(select(User).where(User.cognito_sub == sub))).scalar_one_or_none()
+        if not user:
+            user = User(cognito_sub=sub, email=email or "")
+            db.add(user)
+            await db.commit()
+            await db.refresh(user)
+        return _principal(user)
+
+    stmt = insert(User).values(cognito_sub=sub, email=email or "")
+    # No-op update so RETURNING yields the existing row on conflict
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.cognito_sub],
+        set_={"cognito_sub": stmt.excluded.cognito_sub},
+    ).returning(*_PRINCIPAL_COLS)
+    row = (await db.execute(stmt)).one()
+    await db.commit()
+    return _principal(row)
+
+# ---- DB dependencies ----
 def get_db():
+    ensure_migrated()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+async def get_async_db():
+    await ensure_migrated_async()
+    async with async_session_factory()() as db:
+        yield db
+
+# ---- Verified-claims cache ----
+# sha256(token) -> (kid, claims) for tokens that passed full verification, so the
+# SPA re-sending the same token skips signature checks. Entries expire at the
+# token's `exp` (capped by CLAIMS_CACHE_TTL) and are dropped when their signing
+# key disappears from the JWKS.
+CLAIMS_CACHE_TTL  = float(os.getenv("CLAIMS_CACHE_TTL", "3600"))
+CLAIMS_CACHE_SIZE = int(os.getenv("CLAIMS_CACHE_SIZE", "10000"))
+_claims = TTLCache("verified_claims", maxsize=CLAIMS_CACHE_SIZE, ttl=CLAIMS_CACHE_TTL)
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _remember_claims(digest: str, kid: str | None, claims: dict) -> dict:
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        _claims.set(digest, (kid, claims), ttl=exp - time.time())
+    return claims
+
+def _forget_kids(removed: set[str]) -> None:
+    _claims.pop_where(lambda _digest, entry: entry[0] in removed)
+
 # ---- Local JWT (only for AUTH_MODE="local") ----
 def _decode_local_jwt(token: str) -> str:
+    digest = _token_digest(token)
+    cached = _claims.get(digest)
+    if cached:
+        return cached[1]["sub"]
+    from jose import jwt, JWTError  # lazy: keeps jose off the cold-start path
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         sub = payload.get("sub")
         if not sub:
             raise HTTPException(status_code=401, detail="Invalid token: no sub")
+        _remember_claims(digest, None, payload)
         return sub
     except JWTError as e:
         raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
 
-# ---- JWKS helpers ----
-@lru_cache
-def _get_jwks() -> dict:
-    with urllib.request.urlopen(JWKS_URL, timeout=300) as f:
-        return json.load(f)
+# ---- JWKS key store ----
+JWKS_TTL               = float(os.getenv("JWKS_TTL", "3600"))
+JWKS_MIN_REFETCH       = float(os.getenv("JWKS_MIN_REFETCH", "60"))
+JWKS_FETCH_TIMEOUT     = float(os.getenv("JWKS_FETCH_TIMEOUT", "5"))
+
+@lru_cache(maxsize=1)
+def _jwks_store():
+    from app.jwks import JWKSKeyStore
+
+    store = JWKSKeyStore(
+        JWKS_URL,
+        ttl=JWKS_TTL,
+        min_refetch_interval=JWKS_MIN_REFETCH,
+        timeout=JWKS_FETCH_TIMEOUT,
+    )
+    store.on_rotate(_forget_kids)
+    return store
 
 def _verify_cognito(token: str) -> dict:
     if not (COGNITO_REGION and USER_POOL_ID and APP_CLIENT_ID):
@@ -56,111 +163,103 @@ def _verify_cognito(token: str) -> dict:
     if not JWKS_URL:
         raise HTTPException(status_code=500, detail="Cognito issuer not derived")
 
-    def decode_with_jwks(jwks: dict, *, audience: str | None, verify_aud: bool) -> dict:
+    digest = _token_digest(token)
+    cached = _claims.get(digest)
+    if cached:
+        return cached[1]
+
+    from jose import jwt, JWTError
+    from app.jwks import UnknownKeyError
+
+    try:
+        header = jwt.get_unverified_header(token)
+        token_use = jwt.get_unverified_claims(token).get("token_use")
+    except JWTError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
+
+    # Only an unknown kid can trigger a JWKS refetch (rate limited in the store);
+    # expired or otherwise invalid tokens never cause outbound fetches.
+    try:
+        key = _jwks_store().get_key(header.get("kid"))
+    except UnknownKeyError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
+    except Exception:
+        raise HTTPException(status_code=503, detail="Could not load signing keys")
+
+    def decode(*, audience: str | None, verify_aud: bool) -> dict:
         options = None if verify_aud else {"verify_aud": False}
         return jwt.decode(
             token,
-            jwks,
+            key,
             algorithms=["RS256"],
             issuer=COGNITO_ISSUER,
             audience=audience,
             options=options,
         )
 
-    # Peek at unverified claims to decide which checks to apply
-    try:
-        unverified = jwt.get_unverified_claims(token)
-        token_use = unverified.get("token_use")
-    except Exception:
-        # If we can't parse claims, fall back to full decode (will raise)
-        token_use = None
-
-    # First attempt with current JWKS
     try:
-        jwks = _get_jwks()
-
-        if token_use == "id":
-            # ID token: validate audience against APP_CLIENT_ID
-            claims = decode_with_jwks(jwks, audience=APP_CLIENT_ID, verify_aud=True)
-            if not claims.get("email_verified"):
-                raise HTTPException(status_code=403, detail="Email not verified")
-            return claims
-
-        elif token_use == "access":
+        if token_use == "access":
             # Access token: no audience; validate client_id manually
-            claims = decode_with_jwks(jwks, audience=None, verify_aud=False)
+            claims = decode(audience=None, verify_aud=False)
             if claims.get("client_id") != APP_CLIENT_ID:
                 raise JWTError("Invalid client_id for access token")
-            return claims
-
-        else:
-            # Unknown or missing token_use – try strict ID-token path; if it fails, raise
-            claims = decode_with_jwks(jwks, audience=APP_CLIENT_ID, verify_aud=True)
-            if claims.get("token_use") != "id":
-                raise JWTError("Unsupported token_use")
-            if not claims.get("email_verified"):
-                raise HTTPException(status_code=403, detail="Email not verified")
-            return claims
-
-    except JWTError:
-        # Keys may have rotated: refresh JWKS once and retry
-        _get_jwks.cache_clear()
-        jwks = _get_jwks()
-
-        if token_use == "id":
-            claims = decode_with_jwks(jwks, audience=APP_CLIENT_ID, verify_aud=True)
-            if not claims.get("email_verified"):
-                raise HTTPException(status_code=403, detail="Email not verified")
-            return claims
-        elif token_use == "access":
-            claims = decode_with_jwks(jwks, audience=None, verify_aud=False)
-            if claims.get("client_id") != APP_CLIENT_ID:
-                raise JWTError("Invalid client_id for access token")
-            return claims
-        else:
-            claims = decode_with_jwks(jwks, audience=APP_CLIENT_ID, verify_aud=True)
-            if claims.get("token_use") != "id":
-                raise JWTError("Unsupported token_use")
-            if not claims.get("email_verified"):
-                raise HTTPException(status_code=403, detail="Email not verified")
-            return claims
-        
+            return _remember_claims(digest, header.get("kid"), claims)
+
+        # ID token (or unknown/missing token_use): validate audience against APP_CLIENT_ID
+        claims = decode(audience=APP_CLIENT_ID, verify_aud=True)
+        if claims.get("token_use") != "id":
+            raise JWTError("Unsupported token_use")
+    except JWTError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
+
+    if not claims.get("email_verified"):
+        raise HTTPException(status_code=403, detail="Email not verified")
+    return _remember_claims(digest, header.get("kid"), claims)
+
 # ---- Unified current user dependency ----
-def get_current_user_id(
-    db: Session = Depends(get_db),
+async def get_current_user_id(
+    db: AsyncSession = Depends(get_async_db),
     creds: HTTPAuthorizationCredentials = Depends(security),
-) -> User:
+) -> Principal:
     token = creds.credentials
 
     if AUTH_MODE == "dev-noverify":
         # token == user_id (dev only)
-        user = db.query(User).filter(User.user_id == token).first()
-        if not user:
+        key = ("uid", token)
+        principal = _principals.get(key)
+        if principal:
+            return principal
+        row = (await db.execute(select(*_PRINCIPAL_COLS).where(User.user_id == token))).first()
+        if not row:
             raise HTTPException(status_code=401, detail="Unknown dev user_id")
-        return user
+        return _cache_principal(key, _principal(row))
 
     if AUTH_MODE == "local":
         sub = _decode_local_jwt(token)
-        user = db.query(User).filter(User.cognito_sub == sub).first()
-        if not user:
+        key = ("sub", sub)
+        principal = _principals.get(key)
+        if principal:
+            return principal
+        row = (await db.execute(select(*_PRINCIPAL_COLS).where(User.cognito_sub == sub))).first()
+        if not row:
             raise HTTPException(status_code=401, detail="User not found (local mode)")
-        return user
+        return _cache_principal(key, _principal(row))
 
-    # Default: Cognito
-    claims = _verify_cognito(token)
+    # Default: Cognito. A cache hit is ~1us; a miss may fetch the JWKS, so keep it off the loop.
+    if _token_digest(token) in _claims:
+        claims = _verify_cognito(token)
+    else:
+        claims = await run_in_threadpool(_verify_cognito, token)
 
     if not claims.get("email_verified"):
         raise HTTPException(status_code=403, detail="Email not verified")
 
     sub = claims["sub"]
+    key = ("sub", sub)
+    principal = _principals.get(key)
+    if principal:
+        return principal
+
     email: Optional[str] = claims.get("email")
     email = email.lower() if isinstance(email, str) else None
-
-    user = db.query(User).filter(User.cognito_sub == sub).first()
-    if not user:
-        user = User(cognito_sub=sub, email=email or "")
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-    return user
+    return _cache_principal(key, await _upsert_cognito_user(db, sub, email))
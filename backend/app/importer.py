@@ -0,0 +1,128 @@
+# app/importer.py
+"""
+Streaming CSV / NDJSON parsing and batched inserts for `POST /applications/import`.
+
+The upload is decoded and parsed incrementally, so memory stays bounded by
+one batch of rows regardless of file size. CSV follows RFC 4180: quoted
+fields may contain commas, doubled quotes and newlines. Rows are inserted in
+batches with COPY on Postgres and a multi-row INSERT elsewhere.
+"""
+import codecs, csv, json
+from typing import AsyncIterator, Iterable
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Application
+
+CHUNK_SIZE = 64 * 1024
+MAX_RECORD_CHARS = 1024 * 1024  # one CSV record / NDJSON line
+
+COLUMNS = (
+    "application_id", "user_id", "company", "job_title", "job_description", "job_website",
+    "status", "applied_date", "resume_id", "cv_id", "created_at", "change_seq",
+)
+
+
+class ImportFormatError(ValueError):
+    """The upload as a whole can't be parsed (bad header, runaway record, ...)."""
+
+
+async def read_chunks(upload, size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Chunks from an UploadFile (spooled by Starlette, read back piecewise)."""
+    while chunk := await upload.read(size):
+        yield chunk
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """(line number, line including its newline), decoding UTF-8 (BOM tolerated) incrementally."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending, line_no = "", 0
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            line_no += 1
+            yield line_no, line + "\n"
+        if len(pending) > MAX_RECORD_CHARS:
+            raise ImportFormatError(f"Line {line_no + 1} is longer than {MAX_RECORD_CHARS} characters")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield line_no + 1, pending
+
+
+async def _csv_records(lines: AsyncIterator[tuple[int, str]]) -> AsyncIterator[tuple[int, list[str]]]:
+    """
+    Reassemble physical lines into CSV records: a record is complete at a line
+    end once it holds an even number of quote characters.
+    """
+    start, parts, size, quotes = 0, [], 0, 0
+    async for line_no, line in lines:
+        if not parts:
+            start = line_no
+        parts.append(line)
+        size += len(line)
+        quotes += line.count('"')
+        if size > MAX_RECORD_CHARS:
+            raise ImportFormatError(f"Record starting on line {start} is too long (unbalanced quote?)")
+        if quotes % 2 == 0:
+            yield start, next(csv.reader(["".join(parts)]), [])
+            parts, size, quotes = [], 0, 0
+    if parts:
+        yield start, next(csv.reader(["".join(parts)]), [])
+
+
+async def parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """(line, raw row, None) per data row, or (line, None, error); blank CSV cells become None."""
+    header = None
+    async for line_no, values in _csv_records(_lines(chunks)):
+        if not any(v.strip() for v in values):
+            continue
+        if header is None:
+            header = [h.strip().lower() for h in values]
+            if "company" not in header:
+                raise ImportFormatError("CSV header must include a 'company' column")
+            continue
+        if len(values) > len(header):
+            yield line_no, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield line_no, {h: (v.strip() or None) for h, v in zip(header, values)}, None
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """(line, raw row, None) per JSON object line, or (line, None, error)."""
+    async for line_no, line in _lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, "expected a JSON object"
+            continue
+        yield line_no, row, None
+
+
+async def insert_rows(db: AsyncSession, rows: Iterable[dict]) -> None:
+    """Insert one batch of fully-populated rows (every key in COLUMNS); caller commits."""
+    rows = list(rows)
+    if not rows:
+        return
+    if db.bind.dialect.name == "postgresql":
+        # COPY through the session's own asyncpg connection, inside its transaction
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        if not driver.is_in_transaction():
+            # The asyncpg adapter opens its transaction on the first statement it
+            # runs; make sure COPY doesn't slip in ahead of it and autocommit.
+            await conn.exec_driver_sql("SELECT 1")
+        await driver.copy_records_to_table(
+            Application.__tablename__,
+            columns=COLUMNS,
+            records=[tuple(r[c] for c in COLUMNS) for r in rows],
+        )
+        return
+    await db.execute(insert(Application), rows)
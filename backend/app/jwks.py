@@ -0,0 +1,139 @@
+# app/jwks.py
+"""
+JWKS key store for Cognito token verification.
+
+Keys are parsed once into jose `Key` objects and indexed by `kid`. The set has
+a TTL: past `ttl * refresh_ahead` a request triggers a background refresh and
+keeps using the current keys; only past the full TTL does a caller block on a
+fetch. A token with an unknown `kid` forces a refetch, but at most once per
+`min_refetch_interval` (negative caching), and concurrent callers share a single
+in-flight fetch. A failed fetch is negatively cached too: with no keys to fall
+back on, callers get the same error for `min_refetch_interval` instead of each
+waiting out their own fetch.
+"""
+import json, threading, time, urllib.request
+from typing import Callable
+
+from jose import jwk
+from jose.backends.base import Key
+
+
+class UnknownKeyError(Exception):
+    """No key with the requested kid, even after an allowed refetch."""
+
+
+def _fetch_url(url: str, timeout: float) -> dict:
+    with urllib.request.urlopen(url, timeout=timeout) as f:
+        return json.load(f)
+
+
+class JWKSKeyStore:
+    def __init__(
+        self,
+        url: str,
+        ttl: float = 3600,
+        refresh_ahead: float = 0.8,
+        min_refetch_interval: float = 60,
+        timeout: float = 5,
+        fetch: Callable[[str, float], dict] = _fetch_url,
+    ):
+        self.url = url
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self._fetch = fetch
+
+        self._keys: dict[str, Key] = {}
+        self._fetched_at = 0.0       # monotonic time of last successful fetch
+        self._attempted_at = float("-inf")  # monotonic time of last fetch attempt
+        self._last_error: Exception | None = None  # why the last attempt failed, if it did
+        self._generation = 0         # bumped on every completed fetch
+        self._fetch_lock = threading.Lock()
+        self._bg_running = False
+        self._listeners: list[Callable[[set[str]], None]] = []
+
+    # ---- public API ----
+    def get_key(self, kid: str | None) -> Key:
+        now = time.monotonic()
+        age = now - self._fetched_at
+        if not self._keys or (age >= self.ttl and now - self._attempted_at >= self.min_refetch_interval):
+            self._refresh(self._generation)
+        elif age >= self.ttl * self.refresh_ahead:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid) if kid else None
+        if key is not None:
+            return key
+
+        # Unknown kid: keys may have rotated. Refetch unless we just did.
+        if kid and time.monotonic() - self._attempted_at >= self.min_refetch_interval:
+            self._refresh(self._generation)
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+        raise UnknownKeyError(f"Unknown signing key: {kid!r}")
+
+    def on_rotate(self, listener: Callable[[set[str]], None]) -> None:
+        """Register `listener(removed_kids)`, called when a fetch drops previously known kids."""
+        self._listeners.append(listener)
+
+    @property
+    def kids(self) -> set[str]:
+        return set(self._keys)
+
+    # ---- internals ----
+    def _refresh(self, seen_generation: int) -> None:
+        """Fetch the key set unless another caller completed a fetch meanwhile (single-flight)."""
+        with self._fetch_lock:
+            if self._generation != seen_generation:
+                return
+            if time.monotonic() - self._attempted_at < self.min_refetch_interval:
+                # A fetch just ran; don't queue another behind it
+                if self._last_error is not None and not self._keys:
+                    raise self._last_error.with_traceback(None)
+                return
+            self._attempted_at = time.monotonic()
+            try:
+                doc = self._fetch(self.url, self.timeout)
+            except Exception as e:
+                self._last_error = e
+                if self._keys:
+                    return  # keep serving the keys we have
+                raise
+            self._last_error = None
+            self._install(doc)
+
+    def _install(self, doc: dict) -> None:
+        keys = {}
+        for k in doc.get("keys", []):
+            kid = k.get("kid")
+            if not kid or k.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[kid] = jwk.construct(k, k.get("alg", "RS256"))
+            except Exception:
+                continue  # skip keys we can't use rather than failing the whole set
+        removed = set(self._keys) - set(keys)
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        self._generation += 1
+        if removed:
+            for listener in self._listeners:
+                listener(removed)
+
+    def _refresh_in_background(self) -> None:
+        if self._bg_running:
+            return
+        self._bg_running = True
+        seen = self._generation
+
+        def run():
+            try:
+                self._refresh(seen)
+            except Exception:
+                pass  # next request retries; current keys stay valid until TTL
+            finally:
+                self._bg_running = False
+
+        threading.Thread(target=run, name="jwks-refresh", daemon=True).start()
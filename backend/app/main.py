@@ -1,19 +1,44 @@
 # app/main.py
-from fastapi import FastAPI, Depends, Request
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, files, applications, notes
-from app.db import Base, engine
+from fastapi.responses import PlainTextResponse
+from app import metrics, purge, sync, verification
+from app.routers import auth, files, applications, notes, users
 from mangum import Mangum
 from app.deps import get_current_user_id, get_db
 from sqlalchemy import text
 
-Base.metadata.create_all(bind=engine)
-
+# Schema migrations, the S3 client and jose are all initialised on first use
+# (see app.migrations.ensure_migrated, files.get_s3, app.deps) so a cold start
+# only pays for what its first request actually needs.
 app = FastAPI(title="Job Application Tracker API")
 
-handler = Mangum(app)
+_asgi_handler = Mangum(app)
+
+def _is_warmup(event) -> bool:
+    """Scheduled keep-warm pings (EventBridge rule or serverless-plugin-warmup)."""
+    if not isinstance(event, dict):
+        return False
+    return (
+        event.get("source") in ("aws.events", "serverless-plugin-warmup")
+        or event.get("warmup") is True
+    )
 
-def set_user_state(request: Request, user = Depends(get_current_user_id)):
+def handler(event, context):
+    if _is_warmup(event):
+        return {"warmed": True}
+    # Upload verification (VERIFY_MODE=s3-event / sweep): bucket notifications and the scheduled sweep
+    if verification.is_s3_event(event):
+        return verification.handle_s3_event(event)
+    if isinstance(event, dict) and event.get("task") == verification.SWEEP_TASK:
+        return verification.sweep()
+    if isinstance(event, dict) and event.get("task") == purge.PURGE_TASK:
+        return purge.run_pending()
+    if isinstance(event, dict) and event.get("task") == sync.COMPACT_TASK:
+        return sync.compact()
+    return _asgi_handler(event, context)
+
+async def set_user_state(request: Request, user = Depends(get_current_user_id)):
     request.state.user_id = user.user_id
 
 # Add CORS middleware
@@ -23,6 +48,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[applications.CURSOR_HEADER, "ETag"],
 )
 
 app.include_router(auth.router)
@@ -40,7 +66,24 @@ app.include_router(
     files.router,
     dependencies=[Depends(set_user_state)]
 )
+app.include_router(
+    users.router,
+    dependencies=[Depends(set_user_state)]
+)
+
+# Outermost, so latency includes CORS handling and the full (streamed) body
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    # Fail closed: without a token the endpoint doesn't exist unless METRICS_PUBLIC=1
+    if not metrics.METRICS_TOKEN and not metrics.METRICS_PUBLIC:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if metrics.METRICS_TOKEN and not metrics.authorized(request.headers.get("authorization")):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
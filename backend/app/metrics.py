@@ -0,0 +1,259 @@
+# app/metrics.py
+"""
+Request metrics: per-route latency, status codes, DB time and pool waits.
+
+`MetricsMiddleware` (a plain ASGI middleware, so streaming bodies and
+contextvars pass straight through) times every request and labels it with the
+matched route template, never the raw path. SQLAlchemy cursor events on both
+engines (`instrument_engine`) add each statement's time to the request that
+issued it, via a contextvar that also follows the request into threadpool
+workers. Pool checkout waits are timed by the `Timed*Pool` classes app.db uses
+for its pooled engines.
+
+Everything is exported two ways:
+
+  GET /metrics   Prometheus text format for this process, including the TTL
+                 cache counters from app.cache. Scrapers send
+                 `Authorization: Bearer <METRICS_TOKEN>`; with no token set the
+                 route answers 404 unless METRICS_PUBLIC=1
+  logs           one JSON line per request on the `app.requests` logger, for
+                 CloudWatch Logs Insights / metric filters on Lambda, where
+                 each instance only sees its own traffic
+
+METRICS=0 leaves the middleware out altogether; REQUEST_LOG=0 keeps the
+metrics but drops the log lines. `scripts/bench_metrics_overhead.py` measures
+what the instrumentation costs per request.
+"""
+import bisect, hmac, json, logging, os, threading, time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.cache import cache_stats
+
+METRICS_ENABLED = os.getenv("METRICS", "1") == "1"
+REQUEST_LOG     = os.getenv("REQUEST_LOG", "1") == "1"
+METRICS_TOKEN   = os.getenv("METRICS_TOKEN")
+METRICS_PUBLIC  = os.getenv("METRICS_PUBLIC", "0") == "1"  # serve /metrics without a token
+
+# Seconds; roughly doubling from 5 ms to 10 s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+UNMATCHED = "<unmatched>"
+
+log = logging.getLogger("app.requests")
+log.setLevel(logging.INFO)
+
+
+# -------------------- Registry --------------------
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, key: tuple, amount: float = 1.0) -> None:
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, key)} {_num(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.values: dict[tuple, list] = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, key: tuple, value: float) -> None:
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _num(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_num(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+_lock = threading.Lock()
+REQUESTS = Counter("http_requests_total", "Requests by route and status code.", ("method", "route", "status"))
+LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency, first byte in to last byte out.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request.", ("method", "route"), LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS,
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection.", ("pool",), POOL_WAIT_BUCKETS,
+)
+
+
+def authorized(authorization: str | None) -> bool:
+    """Whether an Authorization header carries METRICS_TOKEN (constant-time compare)."""
+    expected = f"Bearer {METRICS_TOKEN}".encode()
+    return hmac.compare_digest((authorization or "").encode(), expected)
+
+
+def render() -> str:
+    """Prometheus text exposition (format 0.0.4) of everything above plus the caches."""
+    with _lock:
+        lines = []
+        for metric in (REQUESTS, LATENCY, DB_TIME, DB_QUERIES, POOL_WAIT):
+            lines += metric.render()
+    caches = cache_stats()
+    for field, kind, help in (
+        ("hits", "counter", "Cache lookups that found a live entry."),
+        ("misses", "counter", "Cache lookups that found nothing (or an expired entry)."),
+        ("evictions", "counter", "Entries dropped to stay within maxsize."),
+        ("size", "gauge", "Entries currently held."),
+    ):
+        name = f"cache_{field}_total" if kind == "counter" else f"cache_{field}"
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{cache}"}} {stats[field]}' for cache, stats in sorted(caches.items())]
+    return "\n".join(lines) + "\n"
+
+
+# -------------------- Per-request DB accounting --------------------
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    pool_wait: float = 0.0
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def _handle_error(exception_context):
+    # The statement failed, so after_cursor_execute won't pop its start time
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(sync_engine) -> None:
+    """Attribute every statement run on `sync_engine` (or an async engine's .sync_engine) to its request."""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class _TimedCheckout:
+    """Pool mixin: time `_do_get`, which is where a checkout blocks when the pool is exhausted."""
+    pool_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with _lock:
+                POOL_WAIT.observe((self.pool_label,), waited)
+            stats = _current.get()
+            if stats is not None:
+                stats.pool_wait += waited
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pool_label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pool_label = "async"
+
+
+# -------------------- Middleware --------------------
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500  # if the app raises before sending a response
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path", None) or UNMATCHED
+            key = (scope["method"], route)
+            with _lock:
+                REQUESTS.inc(key + (str(status),))
+                LATENCY.observe(key, elapsed)
+                DB_TIME.observe(key, stats.db_seconds)
+                DB_QUERIES.observe(key, stats.queries)
+            if REQUEST_LOG:
+                _log_request(scope, route, status, elapsed, stats)
+
+
+def _log_request(scope, route: str, status: int, elapsed: float, stats: RequestStats) -> None:
+    record = {
+        "event": "request",
+        "method": scope["method"],
+        "route": route,
+        "status": status,
+        "duration_ms": round(elapsed * 1000, 2),
+        "db_queries": stats.queries,
+        "db_ms": round(stats.db_seconds * 1000, 2),
+        "pool_wait_ms": round(stats.pool_wait * 1000, 2),
+    }
+    aws_context = scope.get("aws.context")  # set by Mangum on Lambda
+    if aws_context is not None:
+        record["request_id"] = getattr(aws_context, "aws_request_id", None)
+    log.info(json.dumps(record, separators=(",", ":")))
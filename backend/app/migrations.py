@@ -0,0 +1,237 @@
+# app/migrations.py
+"""
+Versioned schema migrations.
+
+Each migration is a function registered with `@migration(version, name)` and
+runs in its own transaction; applied versions are recorded in
+`schema_migrations`. On Postgres an advisory lock serialises concurrent
+runners (e.g. several Lambda instances starting at once).
+
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations --status   # list applied / pending versions
+
+The app applies pending migrations itself on first DB use (`ensure_migrated`,
+called from `get_db`); set AUTO_MIGRATE=0 to leave that to a deploy step.
+
+New migrations must only ever be appended. Migrations that add columns or
+indexes to existing tables should be idempotent: a fresh database gets the
+current model definitions from the baseline migration.
+"""
+import argparse, os, threading
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, Text, inspect, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import func
+
+from app import models, search
+from app.db import Base
+
+LOCK_KEY = 0x6A6F6262  # arbitrary app-wide advisory lock id
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "1") == "1"
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", Text, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, name: str):
+    def register(fn: Callable[[Connection], None]):
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise RuntimeError(f"Migration {version} registered out of order")
+        MIGRATIONS.append(Migration(version, name, fn))
+        return fn
+    return register
+
+
+def _create_indexes(conn: Connection, table: Table) -> None:
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+
+# -------------------- Migrations --------------------
+@migration(1, "baseline tables")
+def _baseline(conn: Connection) -> None:
+    tables = [
+        models.User.__table__,
+        models.Resume.__table__,
+        models.CV.__table__,
+        models.Application.__table__,
+        models.ApplicationNote.__table__,
+    ]
+    Base.metadata.create_all(conn, tables=tables, checkfirst=True)
+
+
+@migration(2, "application search column and indexes")
+def _search(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        return
+    for stmt in search.POSTGRES_DDL:
+        conn.exec_driver_sql(stmt)
+
+
+@migration(3, "composite indexes for list queries")
+def _list_indexes(conn: Connection) -> None:
+    for model in (models.Application, models.ApplicationNote, models.Resume, models.CV):
+        _create_indexes(conn, model.__table__)
+
+
+@migration(4, "application monthly stats rollup")
+def _monthly_stats(conn: Connection) -> None:
+    from app import analytics
+
+    models.ApplicationMonthlyStat.__table__.create(conn, checkfirst=True)
+    analytics.rebuild(conn)
+
+
+@migration(5, "users data version")
+def _data_version(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns(models.User.__tablename__)}
+    if "data_version" not in columns:
+        conn.exec_driver_sql("ALTER TABLE users ADD COLUMN data_version BIGINT NOT NULL DEFAULT 0")
+
+
+@migration(6, "upload verification status")
+def _upload_status(conn: Connection) -> None:
+    for model in (models.Resume, models.CV):
+        columns = {c["name"] for c in inspect(conn).get_columns(model.__tablename__)}
+        if "upload_status" not in columns:
+            conn.exec_driver_sql(
+                f"ALTER TABLE {model.__tablename__} ADD COLUMN upload_status TEXT NOT NULL DEFAULT 'verified'"
+            )
+
+
+@migration(7, "purge jobs")
+def _purge_jobs(conn: Connection) -> None:
+    models.PurgeJob.__table__.create(conn, checkfirst=True)
+    _create_indexes(conn, models.PurgeJob.__table__)
+
+
+@migration(8, "delta sync change sequence and tombstones")
+def _delta_sync(conn: Connection) -> None:
+    for model in (models.Application, models.ApplicationNote):
+        columns = {c["name"] for c in inspect(conn).get_columns(model.__tablename__)}
+        if "change_seq" not in columns:
+            conn.exec_driver_sql(
+                f"ALTER TABLE {model.__tablename__} ADD COLUMN change_seq BIGINT NOT NULL DEFAULT 0"
+            )
+        _create_indexes(conn, model.__table__)
+    models.SyncTombstone.__table__.create(conn, checkfirst=True)
+    _create_indexes(conn, models.SyncTombstone.__table__)
+
+
+@migration(9, "purge job kind")
+def _purge_job_kind(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns(models.PurgeJob.__tablename__)}
+    if "kind" in columns:
+        return
+    conn.exec_driver_sql("ALTER TABLE purge_jobs ADD COLUMN kind TEXT NOT NULL DEFAULT 'key'")
+    # Only account deletion queued prefix jobs, and it removed the user first; a
+    # "<user_id>/" target whose user still exists came from an upload and stays a key
+    jobs = conn.execute(
+        select(models.PurgeJob.job_id, models.PurgeJob.user_id, models.PurgeJob.target)
+        .where(models.PurgeJob.target.endswith("/"))
+    ).all()
+    owners = {job_id: user_id for job_id, user_id, target in jobs if target == f"{user_id}/"}
+    live = set(conn.execute(
+        select(models.User.user_id).where(models.User.user_id.in_(set(owners.values())))
+    ).scalars()) if owners else set()
+    accounts = [job_id for job_id, user_id in owners.items() if user_id not in live]
+    if accounts:
+        conn.execute(update(models.PurgeJob).where(models.PurgeJob.job_id.in_(accounts)).values(kind="prefix"))
+
+
+# -------------------- Runner --------------------
+def applied_versions(conn: Connection) -> set[int]:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def migrate(engine: Engine) -> list[int]:
+    """Apply pending migrations in order; returns the versions applied."""
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    pending = [m for m in MIGRATIONS if m.version not in done]
+    if not pending:
+        return []
+
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+
+    applied = []
+    for m in pending:
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.exec_driver_sql("SELECT pg_advisory_xact_lock(%s)" % LOCK_KEY)
+                # Another runner may have applied it while we waited
+                if m.version in applied_versions(conn):
+                    continue
+            m.upgrade(conn)
+            conn.execute(insert(schema_migrations).values(version=m.version, name=m.name))
+        applied.append(m.version)
+    return applied
+
+
+_migrated = False
+_migrate_lock = threading.Lock()
+
+
+def ensure_migrated() -> None:
+    """Run pending migrations once per process, on first DB use (not at import)."""
+    global _migrated
+    if _migrated or not AUTO_MIGRATE:
+        return
+    with _migrate_lock:
+        if not _migrated:
+            from app.db import engine
+
+            migrate(engine)
+            _migrated = True
+
+
+async def ensure_migrated_async() -> None:
+    """`ensure_migrated` for async callers: the one-time run happens off the event loop."""
+    if _migrated or not AUTO_MIGRATE:
+        return
+    from starlette.concurrency import run_in_threadpool
+
+    await run_in_threadpool(ensure_migrated)
+
+
+def main() -> None:
+    from app.db import engine
+
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument("--status", action="store_true", help="show applied/pending versions and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        with engine.connect() as conn:
+            done = applied_versions(conn)
+        for m in MIGRATIONS:
+            print(f"{m.version:04d} {'applied' if m.version in done else 'pending'}  {m.name}")
+        return
+
+    applied = migrate(engine)
+    print(f"Applied {len(applied)} migration(s): {applied}" if applied else "Database is up to date.")
+
+
+if __name__ == "__main__":
+    main()
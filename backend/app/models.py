@@ -1,6 +1,6 @@
 # /models.py
 import uuid
-from sqlalchemy import Column, Boolean, Text, DateTime, ForeignKey, Date
+from sqlalchemy import Column, BigInteger, Boolean, Text, DateTime, ForeignKey, Date, Index, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -16,8 +16,11 @@ class User(Base):
     premium   = Column(Boolean, default=False)
     created_at= Column(DateTime(timezone=True), server_default=func.now())
     cognito_sub = Column(Text, unique=True, nullable=True)
+    # Bumped by every write to the user's applications/notes/files (see app.versions)
+    data_version = Column(BigInteger, nullable=False, default=0, server_default="0")
 
-    applications = relationship("Application", back_populates="user", cascade="all, delete")
+    # Rows go with ON DELETE CASCADE in the database; the ORM never loads them to delete them
+    applications = relationship("Application", back_populates="user", cascade="all, delete", passive_deletes=True)
 
 class Resume(Base):
     __tablename__ = "resumes"
@@ -27,6 +30,12 @@ class Resume(Base):
     file_name  = Column(Text, nullable=False)
     label      = Column(Text)
     uploaded_at= Column(DateTime(timezone=True), server_default=func.now())
+    # "pending" until the uploaded object is checked (see app.verification)
+    upload_status = Column(Text, nullable=False, default="verified", server_default="verified")
+
+    __table_args__ = (
+        Index("ix_resumes_user_uploaded", "user_id", uploaded_at.desc()),
+    )
 
     applications = relationship(
         "Application",
@@ -43,6 +52,12 @@ class CV(Base):
     file_name  = Column(Text, nullable=False)
     label      = Column(Text)
     uploaded_at= Column(DateTime(timezone=True), server_default=func.now())
+    # "pending" until the uploaded object is checked (see app.verification)
+    upload_status = Column(Text, nullable=False, default="verified", server_default="verified")
+
+    __table_args__ = (
+        Index("ix_cv_user_uploaded", "user_id", uploaded_at.desc()),
+    )
 
     applications = relationship(
         "Application",
@@ -64,9 +79,23 @@ class Application(Base):
     status        = Column(Text, default="applied")
     applied_date  = Column(Date)
     created_at    = Column(DateTime(timezone=True), server_default=func.now())
+    # users.data_version of the last write to the row (delta sync, see app.sync)
+    change_seq    = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    # One index per list sort key: (user_id, key, application_id) serves both
+    # ASC NULLS LAST and (scanned backwards) DESC NULLS FIRST keyset pages.
+    __table_args__ = (
+        Index("ix_application_user_applied", "user_id", "applied_date", "application_id"),
+        Index("ix_application_user_created", "user_id", "created_at", "application_id"),
+        Index("ix_application_user_company", "user_id", "company", "application_id"),
+        Index("ix_application_user_status", "user_id", "status", "application_id"),
+        Index("ix_application_resume_id", "resume_id"),
+        Index("ix_application_cv_id", "cv_id"),
+        Index("ix_application_user_change_seq", "user_id", "change_seq"),
+    )
 
     user = relationship("User", back_populates="applications")
-    notes = relationship("ApplicationNote", back_populates="application", cascade="all, delete")
+    notes = relationship("ApplicationNote", back_populates="application", cascade="all, delete", passive_deletes=True)
     resume = relationship("Resume", back_populates="applications")
     cv     = relationship("CV",     back_populates="applications")
     
@@ -78,5 +107,64 @@ class ApplicationNote(Base):
     user_id       = Column(UUID(as_uuid=False), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
     content       = Column(Text, nullable=False)
     created_at    = Column(DateTime(timezone=True), server_default=func.now())
+    change_seq    = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_application_notes_app_created", "application_id", created_at.desc()),
+        Index("ix_application_notes_user_id", "user_id"),
+        Index("ix_application_notes_user_change_seq", "user_id", "change_seq"),
+    )
 
     application   = relationship("Application", back_populates="notes")
+
+
+class ApplicationMonthlyStat(Base):
+    """Rollup: applications per user, per creation month (UTC), per current status.
+
+    Maintained incrementally by the applications router; rebuilt by
+    `python -m app.analytics rebuild`.
+    """
+    __tablename__ = "application_monthly_stats"
+    user_id = Column(UUID(as_uuid=False), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    month   = Column(Date, primary_key=True)  # first day of the month
+    status  = Column(Text, primary_key=True)
+    count   = Column(Integer, nullable=False, default=0)
+
+
+class PurgeJob(Base):
+    """S3 objects to remove after their rows were deleted (see app.purge).
+
+    No foreign key to users: an account's purge job outlives the account.
+    """
+    __tablename__ = "purge_jobs"
+    job_id     = Column(UUID(as_uuid=False), primary_key=True, default=uuid_pk)
+    user_id    = Column(UUID(as_uuid=False), nullable=False)
+    target     = Column(Text, nullable=False)  # a single object key, or "<user_id>/" for an account
+    kind       = Column(Text, nullable=False, default="key", server_default="key")  # "key" | "prefix"
+    status     = Column(Text, nullable=False, default="pending", server_default="pending")
+    attempts   = Column(Integer, nullable=False, default=0, server_default="0")
+    objects_deleted = Column(Integer, nullable=False, default=0, server_default="0")
+    batches    = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_purge_jobs_status_updated", "status", "updated_at"),
+        Index("ix_purge_jobs_user_id", "user_id"),
+    )
+
+
+class SyncTombstone(Base):
+    """A deleted application or note, kept for delta sync until compacted (see app.sync)."""
+    __tablename__ = "sync_tombstones"
+    entity_id  = Column(UUID(as_uuid=False), primary_key=True)
+    kind       = Column(Text, nullable=False)  # "application" | "note"
+    user_id    = Column(UUID(as_uuid=False), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_change_seq", "user_id", "change_seq"),
+        Index("ix_sync_tombstones_deleted_at", "deleted_at"),
+    )
@@ -0,0 +1,269 @@
+# app/purge.py
+"""
+S3 cleanup for deleted accounts and documents, off the request path.
+
+Deleting rows is a single statement: the database's ON DELETE CASCADE / SET
+NULL constraints remove or detach everything below it. The objects those rows
+pointed at are removed afterwards by a `purge_jobs` row, added in the same
+transaction as the delete (`job_for`) so a committed delete always has one.
+
+A job's `kind` says what its target is: a single object `key` (a deleted or
+rejected document, `job_for`) or, for a deleted account only, the account's
+key `prefix` ("<user_id>/", `job_for_account`). `run_job` lists a prefix (a key
+is its own single-item list) and removes it with `delete_objects`,
+up to 1000 keys per call, recording `objects_deleted` / `batches` after every
+call. Re-running a job is safe (already-deleted keys are simply no longer
+listed), so a job that fails is marked `failed` but stays claimable by
+`run_pending` until it has made MAX_ATTEMPTS attempts; after that only
+`retry` brings it back.
+
+PURGE_MODE selects who runs jobs:
+
+  local      (default outside Lambda) an in-process queue drained by a worker
+             thread. It runs each new job once; failed jobs wait for
+             `python -m app.purge run`.
+  scheduled  (default on Lambda, where a thread is frozen once the response is
+             returned) nothing in-process; a scheduled {"task": "purge"} event,
+             e.g. an EventBridge rule every few minutes, runs `run_pending`,
+             which also retries failed and stale jobs
+
+    python -m app.purge run                  # run pending / retryable jobs
+    python -m app.purge status [--user ID]   # progress of recent jobs
+    python -m app.purge retry JOB_ID         # re-queue a failed job
+"""
+import argparse, logging, os, queue, sys, threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import func
+
+from app.db import engine
+from app.models import PurgeJob, uuid_pk
+
+log = logging.getLogger(__name__)
+
+PURGE_MODE   = os.getenv(
+    "PURGE_MODE", "scheduled" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "local"
+)  # "local" | "scheduled"
+MAX_ATTEMPTS = int(os.getenv("PURGE_MAX_ATTEMPTS", "5"))
+# A running job that made no progress for this long is assumed dead and taken over
+STALE_AFTER  = int(os.getenv("PURGE_STALE_AFTER", "900"))
+BATCH_SIZE   = 1000  # delete_objects limit
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+KEY, PREFIX = "key", "prefix"
+PURGE_TASK = "purge"
+
+
+class PurgeError(Exception):
+    pass
+
+
+def job_for(user_id: str, key: str) -> PurgeJob:
+    """A new job for one object; add it to the session that deletes the rows, `enqueue` after commit."""
+    return PurgeJob(job_id=uuid_pk(), user_id=user_id, target=key, kind=KEY, status=PENDING)
+
+
+def job_for_sync(conn: Connection, user_id: str, key: str) -> str:
+    """`job_for` on a Core connection (background verification); returns the job id."""
+    job_id = uuid_pk()
+    conn.execute(insert(PurgeJob).values(job_id=job_id, user_id=user_id, target=key, kind=KEY, status=PENDING))
+    return job_id
+
+
+def job_for_account(user_id: str) -> PurgeJob:
+    """A new job for every object under a deleted account's prefix; as `job_for`."""
+    return PurgeJob(job_id=uuid_pk(), user_id=user_id, target=account_prefix(user_id), kind=PREFIX, status=PENDING)
+
+
+def account_prefix(user_id: str) -> str:
+    return f"{user_id}/"
+
+
+def _batches(kind: str, target: str):
+    """Keys the job covers, BATCH_SIZE at a time (blocking)."""
+    from app.routers import files
+
+    if kind != PREFIX:
+        yield [target]
+        return
+    pages = files.get_s3().get_paginator("list_objects_v2").paginate(
+        Bucket=files.S3_BUCKET, Prefix=target, PaginationConfig={"PageSize": BATCH_SIZE}
+    )
+    for page in pages:
+        keys = [obj["Key"] for obj in page.get("Contents", [])]
+        if keys:
+            yield keys
+
+
+def _delete_batch(keys: list[str]) -> int:
+    from app.routers import files
+
+    resp = files.get_s3().delete_objects(
+        Bucket=files.S3_BUCKET,
+        Delete={"Objects": [{"Key": k} for k in keys], "Quiet": True},
+    )
+    errors = resp.get("Errors", [])
+    if errors:
+        first = errors[0]
+        raise PurgeError(
+            f"{len(errors)} of {len(keys)} object(s) not deleted; "
+            f"{first.get('Key')}: {first.get('Code')} {first.get('Message', '')}".rstrip()
+        )
+    return len(keys)
+
+
+def _claimable(now: datetime):
+    return or_(
+        PurgeJob.status == PENDING,
+        (PurgeJob.status == FAILED) & (PurgeJob.attempts < MAX_ATTEMPTS),
+        (PurgeJob.status == RUNNING) & (PurgeJob.updated_at < now - timedelta(seconds=STALE_AFTER)),
+    )
+
+
+def run_job(job_id: str) -> str | None:
+    """Claim and run one job; returns its final status, or None if another runner has it."""
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        job = conn.execute(
+            update(PurgeJob)
+            .where(PurgeJob.job_id == job_id, _claimable(now))
+            .values(status=RUNNING, attempts=PurgeJob.attempts + 1, updated_at=func.now())
+            .returning(PurgeJob.kind, PurgeJob.target)
+        ).one_or_none()
+    if job is None:
+        return None
+    kind, target = job
+
+    try:
+        for keys in _batches(kind, target):
+            deleted = _delete_batch(keys)
+            with engine.begin() as conn:
+                conn.execute(
+                    update(PurgeJob)
+                    .where(PurgeJob.job_id == job_id)
+                    .values(
+                        objects_deleted=PurgeJob.objects_deleted + deleted,
+                        batches=PurgeJob.batches + 1,
+                        updated_at=func.now(),
+                    )
+                )
+    except Exception as e:
+        log.warning("Purge job %s (%s) failed: %s", job_id, target, e)
+        with engine.begin() as conn:
+            conn.execute(
+                update(PurgeJob)
+                .where(PurgeJob.job_id == job_id)
+                .values(status=FAILED, last_error=str(e)[:1000], updated_at=func.now())
+            )
+        return FAILED
+
+    with engine.begin() as conn:
+        conn.execute(
+            update(PurgeJob)
+            .where(PurgeJob.job_id == job_id)
+            .values(status=DONE, last_error=None, updated_at=func.now())
+        )
+    log.info("Purge job %s (%s) done", job_id, target)
+    return DONE
+
+
+def run_pending(limit: int = 100) -> dict:
+    """Run every claimable job (pending, retryable, or stale), oldest first."""
+    with engine.connect() as conn:
+        job_ids = conn.execute(
+            select(PurgeJob.job_id)
+            .where(_claimable(datetime.now(timezone.utc)))
+            .order_by(PurgeJob.created_at)
+            .limit(limit)
+        ).scalars().all()
+    outcome = {DONE: 0, FAILED: 0}
+    for job_id in job_ids:
+        status = run_job(job_id)
+        if status:
+            outcome[status] += 1
+    return outcome
+
+
+def retry(job_id: str) -> bool:
+    """Give a job a fresh set of attempts; False if no such job or it already finished."""
+    with engine.begin() as conn:
+        return conn.execute(
+            update(PurgeJob)
+            .where(PurgeJob.job_id == job_id, PurgeJob.status != DONE)
+            .values(status=PENDING, attempts=0, updated_at=func.now())
+        ).rowcount == 1
+
+
+# -------------------- Local queue (PURGE_MODE=local) --------------------
+_queue: "queue.Queue[str]" = queue.Queue()
+_worker: threading.Thread | None = None
+_worker_lock = threading.Lock()
+
+
+def _drain() -> None:
+    while True:
+        job_id = _queue.get()
+        try:
+            run_job(job_id)
+        except Exception:
+            log.exception("Purge job %s could not be run; `python -m app.purge run` picks it up", job_id)
+        finally:
+            _queue.task_done()
+
+
+def enqueue(job_id: str) -> None:
+    """Run a just-committed job in the background (no-op when a schedule drives purging)."""
+    global _worker
+    if PURGE_MODE != "local":
+        return
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_drain, name="purger", daemon=True)
+                _worker.start()
+    _queue.put(job_id)
+
+
+def wait_idle() -> None:
+    """Block until the local queue is empty (scripts / smoke checks)."""
+    _queue.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run and inspect S3 purge jobs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="run pending and retryable jobs")
+    p_run.add_argument("--limit", type=int, default=100)
+    p_status = sub.add_parser("status", help="show recent jobs")
+    p_status.add_argument("--user", help="only this user's jobs")
+    p_status.add_argument("--limit", type=int, default=20)
+    p_retry = sub.add_parser("retry", help="re-queue a failed job")
+    p_retry.add_argument("job_id")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        outcome = run_pending(args.limit)
+        print(f"{outcome[DONE]} job(s) done, {outcome[FAILED]} failed.")
+        sys.exit(1 if outcome[FAILED] else 0)
+    if args.command == "retry":
+        if not retry(args.job_id):
+            sys.exit(f"No unfinished job {args.job_id}")
+        print(f"Job {args.job_id} re-queued; run `python -m app.purge run`.")
+        return
+
+    stmt = select(PurgeJob).order_by(PurgeJob.created_at.desc()).limit(args.limit)
+    if args.user:
+        stmt = stmt.where(PurgeJob.user_id == args.user)
+    with engine.connect() as conn:
+        for job in conn.execute(stmt):
+            print(
+                f"{job.job_id}  {job.status:<8} attempts={job.attempts} "
+                f"deleted={job.objects_deleted} batches={job.batches}  {job.kind} {job.target}"
+                + (f"\n    last error: {job.last_error}" if job.last_error else "")
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,24 @@
 # app/routers/applications.py
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+import base64, csv, io, json, os, uuid
+from collections import Counter
+from datetime import date, datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import (
+    Boolean, and_, case, cast, column, delete, func, insert, literal_column, select, tuple_, union_all, update, values,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from types import SimpleNamespace
 from typing import Literal
+from pydantic import ValidationError
 
-from app import models, schemas
-from app.deps import get_db, get_current_user_id
+from app import analytics, importer, models, schemas, search, sync, verification, versions
+from app.cache import TTLCache
+from app.db import async_session_factory
+from app.deps import get_async_db, get_current_user_id
+from app.routers import files
 
 def clamp(value, min_value, max_value):
     return max(min_value, min(value, max_value))
@@ -13,154 +27,985 @@ router = APIRouter(prefix="/applications", tags=["applications"])
 
 ALLOWED_STATUSES = {"applied", "interviewing", "offer", "rejected"}
 
+# Columns a list request may ask for via `fields=`; the default omits the
+# (potentially large) job_description, which only the detail view shows.
+LIST_FIELDS = tuple(schemas.ApplicationSummaryOut.model_fields)
+SUMMARY_FIELDS = tuple(f for f in LIST_FIELDS if f != "job_description")
 
-def _get_owned_app(db: Session, user_id: str, application_id: str) -> models.Application:
-    app = (
-        db.query(models.Application)
-        .filter(
-            models.Application.application_id == application_id,
-            models.Application.user_id == user_id,
+# Status tab counts per (user, data version, q): any write by the user moves
+# the version on, so stale entries are never read again and simply age out.
+FACET_CACHE_TTL  = float(os.getenv("FACET_CACHE_TTL", "300"))
+FACET_CACHE_SIZE = int(os.getenv("FACET_CACHE_SIZE", "10000"))
+_facets = TTLCache("status_facets", maxsize=FACET_CACHE_SIZE, ttl=FACET_CACHE_TTL)
+
+
+APP_COLUMNS = tuple(c for c in models.Application.__table__.c if c.key != "change_seq")
+
+
+def _owned(user_id: str, application_id: str):
+    return (
+        models.Application.application_id == application_id,
+        models.Application.user_id == user_id,
+    )
+
+
+async def _update_owned(db: AsyncSession, user_id: str, application_id: str, values: dict, seq: int):
+    """
+    One ownership-scoped UPDATE ... RETURNING, stamped with `seq` (the version
+    the caller's `bump` returned); 404 if the user has no such application.
+
+    The row comes back with its new values plus `old_status`, which the stats
+    rollup needs when the status changes. On Postgres that is read from a
+    self-join that takes the row lock first, so it is exact under concurrency.
+    SQLite can't RETURNING from a joined table; when the status is being set it
+    reads the old one first (its writers are serialised anyway).
+    """
+    values = {**values, "change_seq": seq}
+    if db.bind.dialect.name != "postgresql":
+        old = None
+        if "status" in values:
+            old = (
+                await db.execute(select(models.Application.status).where(*_owned(user_id, application_id)))
+            ).first()
+            if old is None:
+                raise HTTPException(status_code=404, detail="Application not found")
+        stmt = (
+            update(models.Application)
+            .where(*_owned(user_id, application_id))
+            .values(**values)
+            .returning(*APP_COLUMNS)
+            .execution_options(synchronize_session=False)
         )
-        .first()
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Application not found")
+        return SimpleNamespace(**row._asdict(), old_status=old.status if old else row.status)
+
+    before = (
+        select(models.Application.application_id, models.Application.status.label("old_status"))
+        .where(*_owned(user_id, application_id))
+        .with_for_update()
+        .subquery()
+    )
+    stmt = (
+        update(models.Application)
+        .where(models.Application.application_id == before.c.application_id)
+        .values(**values)
+        .returning(*APP_COLUMNS, before.c.old_status)
+        .execution_options(synchronize_session=False)
     )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return row
+
+
+def _app_out(row) -> dict:
+    out = {c.key: getattr(row, c.key) for c in APP_COLUMNS}
+    out["status"] = out["status"] or analytics.DEFAULT_STATUS  # legacy rows may have none
+    return out
+
+
+async def _get_owned_app(db: AsyncSession, user_id: str, application_id: str) -> models.Application:
+    app = (
+        await db.execute(select(models.Application).where(*_owned(user_id, application_id)))
+    ).scalar_one_or_none()
     if not app:
         raise HTTPException(status_code=404, detail="Application not found")
     return app
 
 
-@router.get("", response_model=list[schemas.ApplicationOut])
-def list_applications(
+# -------------------- Cursor pagination --------------------
+# Cursors are opaque to clients: base64url(JSON [sort_by, order, last sort value, last id]).
+# Rows are ordered by (sort column, application_id) with NULLs sorting as the largest
+# value (ASC NULLS LAST / DESC NULLS FIRST, Postgres' default), so one
+# (user_id, column, application_id) index serves both directions. A page is always
+# "the next `limit` rows after the last one seen" and costs the same regardless of
+# how deep the client has scrolled.
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_cursor(sort_by: str, order: str, value, application_id: str) -> str:
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    raw = json.dumps([sort_by, order, value, application_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str, order: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        c_sort, c_order, value, last_id = json.loads(raw)
+        if value is not None and sort_by == "created_at":
+            value = datetime.fromisoformat(value)
+        elif value is not None and sort_by == "applied_date":
+            value = date.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if (c_sort, c_order) != (sort_by, order):
+        raise HTTPException(status_code=400, detail="Cursor does not match sort_by/order")
+    return value, last_id
+
+
+def _parse_fields(fields: str | None) -> list[str]:
+    if not fields:
+        return list(SUMMARY_FIELDS)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(LIST_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(["application_id", *requested]))
+
+
+def _after_cursor(col, order: str, value, last_id: str) -> list:
+    """
+    Keyset predicates for the rows strictly after (value, last_id), as consecutive
+    blocks in list order. Each is a single row-value comparison or NULL test the
+    (user_id, column, application_id) index can seek on; an OR across the NULL
+    boundary would leave Postgres filtering every row of the earlier pages.
+    """
+    id_col = models.Application.application_id
+    if order == "asc":
+        if value is None:
+            # Already inside the trailing NULL block; only the tie-breaker advances.
+            return [and_(col.is_(None), id_col > last_id)]
+        return [tuple_(col, id_col) > (value, last_id), col.is_(None)]
+    if value is None:
+        # Leading NULL block: finish it, then every non-NULL row follows.
+        return [and_(col.is_(None), id_col < last_id), col.is_not(None)]
+    return [tuple_(col, id_col) < (value, last_id)]
+
+
+def _page_query(query, blocks: list, sort_key: str, order: str, limit: int | None):
+    """
+    `query` ordered and limited, restricted to the cursor's blocks. Two blocks
+    become one UNION ALL statement of separately ordered (and limited) index
+    scans, ordered block by block.
+    """
+    id_col = models.Application.application_id
+    col = query.selected_columns[sort_key]
+    if order == "asc":
+        ordering = (col.asc().nulls_last(), id_col.asc())
+    else:
+        ordering = (col.desc().nulls_first(), id_col.desc())
+
+    if len(blocks) < 2:
+        query = query.where(*blocks).order_by(*ordering)
+        return query if limit is None else query.limit(limit)
+
+    parts = []
+    for i, block in enumerate(blocks):
+        part = query.where(block).add_columns(literal_column(str(i)).label("block")).order_by(*ordering)
+        if limit is not None:
+            part = part.limit(limit)
+        parts.append(select(part.subquery()))
+    both = union_all(*parts).subquery()
+    direction = "asc" if order == "asc" else "desc"
+    merged = select(both).order_by(
+        both.c.block,
+        getattr(both.c[sort_key], direction)(),
+        getattr(both.c.application_id, direction)(),
+    )
+    return merged if limit is None else merged.limit(limit)
+
+
+@router.get(
+    "",
+    response_model=list[schemas.ApplicationSummaryOut],
+    response_model_exclude_unset=True,
+)
+async def list_applications(
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     q: str | None = Query(None, description="search company/title/description"),
     status_eq: str | None = Query(None),
-    sort_by: Literal["created_at","applied_date","company","status"] = "applied_date",
+    sort_by: Literal["created_at","applied_date","company","status","relevance"] = "applied_date",
     order: Literal["asc","desc"] = "desc",
+    limit: int | None = Query(None, ge=1, le=200, description="page size; omit to return every row"),
+    cursor: str | None = Query(None, description=f"opaque cursor from the {CURSOR_HEADER} response header"),
+    fields: str | None = Query(None, description="comma-separated columns to return (default: all but job_description)"),
 ):
-    from sqlalchemy import asc, desc, or_
+    dialect = db.bind.dialect.name
+    out_fields = _parse_fields(fields)
+    if unchanged := await versions.not_modified(request, response, db, current_user.user_id):
+        return unchanged
 
+    # Load only the requested columns (plus the sort key the cursor needs)
+    load = list(out_fields)
+    if sort_by != "relevance" and sort_by not in load:
+        load.append(sort_by)
     query = (
-        db.query(models.Application)
-        .filter(models.Application.user_id == current_user.user_id)  
+        select(*(getattr(models.Application, f) for f in load))
+        .where(models.Application.user_id == current_user.user_id)  
     )
 
     if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                models.Application.company.ilike(like),
-                models.Application.job_title.ilike(like),
-                models.Application.job_description.ilike(like),
-            )
-        )
+        query = query.where(search.search_filter(dialect, q))
 
     if status_eq and status_eq != "all":
-        query = query.filter(models.Application.status == status_eq)
+        query = query.where(models.Application.status == status_eq)
+
+    if sort_by == "relevance":
+        if not q:
+            raise HTTPException(status_code=400, detail="sort_by=relevance requires q")
+        col = search.search_rank(dialect, q)
+        query = query.add_columns(col.label("relevance"))
+    else:
+        col = getattr(models.Application, sort_by)
+    blocks = _after_cursor(col, order, *_decode_cursor(cursor, sort_by, order)) if cursor else []
+
+    # Fetch one extra row to learn whether another page exists
+    query = _page_query(query, blocks, sort_by, order, None if limit is None else limit + 1)
+    rows = (await db.execute(query)).all()
+
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[CURSOR_HEADER] = _encode_cursor(
+            sort_by, order, getattr(last, sort_by), last.application_id
+        )
+
+    return [{f: getattr(row, f) for f in out_fields} for row in rows]
+
+
+@router.get("/facets", response_model=dict[str, int])
+async def status_facets(
+    current_user: models.User = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+    q: str | None = Query(None, description="same search filter as the list endpoint"),
+):
+    """Per-status counts (plus "all") for the status tabs, under the list's `q` filter."""
+    q = (q or "").strip() or None
+    key = (current_user.user_id, await versions.current(db, current_user.user_id), q)
+    cached = _facets.get(key)
+    if cached is not None:
+        return cached
 
-    col = getattr(models.Application, sort_by)
-    query = query.order_by(asc(col) if order == "asc" else desc(col))
+    status_col = func.coalesce(models.Application.status, analytics.DEFAULT_STATUS)
+    query = (
+        select(status_col, func.count())
+        .where(models.Application.user_id == current_user.user_id)
+        .group_by(status_col)
+    )
+    if q:
+        query = query.where(search.search_filter(db.bind.dialect.name, q))
 
-    return query.all()
+    counts = dict.fromkeys(sorted(ALLOWED_STATUSES), 0)
+    counts.update((await db.execute(query)).tuples().all())
+    counts = {"all": sum(counts.values()), **counts}
+    _facets.set(key, counts)
+    return counts
 
 
 @router.post("", status_code=201)
-def create_application(
+async def create_application(
     payload: schemas.ApplicationCreate,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    app = models.Application(user_id=current_user.user_id, **payload.model_dump())
-    db.add(app)
-    db.commit()
-    db.refresh(app)
-    return app
+    # created_at is set here rather than by the server default so the rollup
+    # month is known without a round trip
+    seq = await versions.bump(db, current_user.user_id)
+    stmt = (
+        insert(models.Application)
+        .values(
+            user_id=current_user.user_id,
+            created_at=datetime.now(timezone.utc),
+            change_seq=seq,
+            **payload.model_dump(),
+        )
+        .returning(*APP_COLUMNS)
+    )
+    row = (await db.execute(stmt)).one()
+    await analytics.apply_deltas(db, current_user.user_id, analytics.deltas_for([row]))
+    await db.commit()
+    return _app_out(row)
+
+
+@router.get("/stats", response_model=list[schemas.MonthlyStatsOut])
+async def application_stats(
+    current_user: models.User = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+    months: int = Query(12, ge=1, le=120, description="how many months back, including the current one"),
+):
+    """Per-month counts from the rollup, oldest first; months with no activity are zero-filled."""
+    this_month = analytics.month_of(None)
+    first = this_month
+    for _ in range(months - 1):
+        first = date(first.year - (first.month == 1), (first.month - 2) % 12 + 1, 1)
+
+    Stat = models.ApplicationMonthlyStat
+    rows = (
+        await db.execute(
+            select(Stat.month, Stat.status, Stat.count).where(
+                Stat.user_id == current_user.user_id,
+                Stat.month >= first,
+            )
+        )
+    ).all()
+
+    by_month: dict[date, dict[str, int]] = {}
+    month = first
+    while month <= this_month:
+        by_month[month] = dict.fromkeys(ALLOWED_STATUSES, 0)
+        month = date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+    for row in rows:
+        counts = by_month.get(row.month)
+        if counts is not None:
+            counts[row.status] = counts.get(row.status, 0) + row.count
+
+    return [
+        {
+            "month": month,
+            "new": sum(counts.values()),
+            "applied": counts["applied"],
+            "interviewing": counts["interviewing"],
+            "offer": counts["offer"],
+            "rejected": counts["rejected"],
+            "in_progress": counts["applied"] + counts["interviewing"],
+        }
+        for month, counts in by_month.items()
+    ]
+
+
+@router.get("/changes", response_model=schemas.ChangesOut)
+async def application_changes(
+    current_user: models.User = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+    since: str | None = Query(None, description="cursor from the previous response; omit for a full snapshot"),
+):
+    """
+    Applications and notes created, updated or deleted since `since` (see app.sync).
+    Without a usable cursor the response is a full snapshot with `reset: true`.
+    """
+    user_id = current_user.user_id
+    # Read the version first: anything committed after it is at worst sent twice
+    version = await versions.current(db, user_id)
+    seen = 0
+    if since is not None:
+        seen, issued_at = sync.decode_cursor(since)
+    reset = since is None or sync.expired(issued_at) or seen > version
+    if reset:
+        seen = 0
+
+    out = {
+        "cursor": sync.encode_cursor(version), "reset": reset,
+        "applications": [], "notes": [], "deleted_applications": [], "deleted_notes": [],
+    }
+    if seen == version and not reset:
+        return out
+
+    Note, Tombstone = models.ApplicationNote, models.SyncTombstone
+    out["applications"] = [_app_out(row) for row in await db.execute(
+        select(*APP_COLUMNS).where(models.Application.user_id == user_id, models.Application.change_seq > seen)
+    )]
+    out["notes"] = (await db.execute(
+        select(Note).where(Note.user_id == user_id, Note.change_seq > seen)
+    )).scalars().all()
+    if not reset:
+        for entity_id, kind in await db.execute(
+            select(Tombstone.entity_id, Tombstone.kind)
+            .where(Tombstone.user_id == user_id, Tombstone.change_seq > seen)
+        ):
+            out["deleted_applications" if kind == sync.APPLICATION else "deleted_notes"].append(entity_id)
+    return out
+
+
+# -------------------- Import --------------------
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_ERRORS = 1000  # listed in the response; `failed` keeps counting
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+IMPORT_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def _import_row(raw: dict, user_id: str, resume_ids: set, cv_ids: set) -> tuple[dict | None, str | None]:
+    try:
+        data = schemas.ApplicationCreate.model_validate(raw).model_dump()
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    data["status"] = data["status"] or analytics.DEFAULT_STATUS
+    if data["status"] not in ALLOWED_STATUSES:
+        return None, f"status: must be one of {', '.join(sorted(ALLOWED_STATUSES))}"
+    if data["resume_id"] and data["resume_id"] not in resume_ids:
+        return None, "resume_id: no such resume"
+    if data["cv_id"] and data["cv_id"] not in cv_ids:
+        return None, "cv_id: no such CV"
+    data.update(
+        application_id=str(uuid.uuid4()),
+        user_id=user_id,
+        created_at=datetime.now(timezone.utc),
+    )
+    return data, None
+
+
+@router.post("/import", response_model=schemas.ImportResultOut)
+async def import_applications(
+    request: Request,
+    current_user: models.User = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+    format: Literal["csv", "ndjson"] | None = Query(
+        None, description="defaults from the Content-Type (or the uploaded file's type/extension)"
+    ),
+):
+    """
+    Import applications from CSV (header row required; columns as in ApplicationCreate)
+    or NDJSON (one ApplicationCreate object per line), sent as the raw request body or
+    as multipart field `file`.
+
+    The upload is parsed as a stream and inserted in committed batches of
+    IMPORT_BATCH_SIZE rows; invalid rows are reported by line and skipped.
+    """
+    ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if ctype == "multipart/form-data":
+        form = await request.form()  # file parts are spooled to disk, not held in memory
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Attach the file as form field 'file'")
+        chunks = importer.read_chunks(upload)
+        ext = os.path.splitext(upload.filename or "")[1].lower()
+        fmt = format or IMPORT_FORMATS.get((upload.content_type or "").lower()) or IMPORT_EXTENSIONS.get(ext)
+    else:
+        chunks = request.stream()
+        fmt = format or IMPORT_FORMATS.get(ctype)
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass format=")
+
+    user_id = current_user.user_id
+    resume_ids = set((await db.execute(select(models.Resume.resume_id).where(models.Resume.user_id == user_id))).scalars())
+    cv_ids = set((await db.execute(select(models.CV.cv_id).where(models.CV.user_id == user_id))).scalars())
+
+    result = {"imported": 0, "failed": 0, "errors": [], "errors_truncated": False, "aborted": None}
+
+    def fail(line: int, error: str) -> None:
+        result["failed"] += 1
+        if len(result["errors"]) < IMPORT_MAX_ERRORS:
+            result["errors"].append({"line": line, "error": error})
+        else:
+            result["errors_truncated"] = True
+
+    batch: list[dict] = []
+    batch_lines: list[int] = []
+
+    async def flush() -> None:
+        if not batch:
+            return
+        try:
+            seq = await versions.bump(db, user_id)
+            await importer.insert_rows(db, [{**r, "change_seq": seq} for r in batch])
+            await analytics.apply_deltas(
+                db, user_id, Counter((analytics.month_of(r["created_at"]), r["status"]) for r in batch)
+            )
+            await db.commit()
+            result["imported"] += len(batch)
+        except Exception as e:
+            await db.rollback()
+            for line in batch_lines:
+                fail(line, f"batch insert failed: {e.__class__.__name__}")
+        batch.clear()
+        batch_lines.clear()
+
+    parse = importer.parse_csv if fmt == "csv" else importer.parse_ndjson
+    try:
+        async for line, raw, error in parse(chunks):
+            row = None
+            if error is None:
+                row, error = _import_row(raw, user_id, resume_ids, cv_ids)
+            if error:
+                fail(line, error)
+                continue
+            batch.append(row)
+            batch_lines.append(line)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
+        await flush()
+    except importer.ImportFormatError as e:
+        if not (batch or result["imported"] or result["failed"]):
+            raise HTTPException(status_code=400, detail=str(e))
+        # Batches already committed stay imported; report where parsing gave up
+        await flush()
+        result["aborted"] = str(e)
+    return result
+
+
+# -------------------- Export --------------------
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "200"))
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+async def _export_batches(user_id: str):
+    """
+    Yield (application rows, {application_id: [note rows]}) a batch at a time.
+
+    Applications come off a server-side cursor (`yield_per`); each batch's notes
+    are fetched with one IN query. The generator owns its session: the request's
+    session is closed before a streaming body starts.
+    """
+    Note = models.ApplicationNote
+    query = (
+        select(*(getattr(models.Application, f) for f in LIST_FIELDS))
+        .where(models.Application.user_id == user_id)
+        .order_by(models.Application.created_at, models.Application.application_id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    async with async_session_factory()() as db:
+        result = await db.stream(query)
+        async for apps in result.partitions():
+            notes: dict[str, list] = {a.application_id: [] for a in apps}
+            note_rows = await db.execute(
+                select(Note.application_id, Note.note_id, Note.content, Note.created_at)
+                .where(Note.application_id.in_(list(notes)), Note.user_id == user_id)
+                .order_by(Note.application_id, Note.created_at)
+            )
+            for n in note_rows:
+                notes[n.application_id].append(n)
+            yield apps, notes
+
+
+async def _export_ndjson(user_id: str):
+    async for apps, notes in _export_batches(user_id):
+        lines = []
+        for a in apps:
+            doc = {f: _jsonable(getattr(a, f)) for f in LIST_FIELDS}
+            doc["notes"] = [
+                {"note_id": n.note_id, "content": n.content, "created_at": _jsonable(n.created_at)}
+                for n in notes[a.application_id]
+            ]
+            lines.append(json.dumps(doc, ensure_ascii=False))
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def _export_csv(user_id: str):
+    # Same columns as the import format (plus notes), so an export can be re-imported
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([*LIST_FIELDS, "notes"])
+    async for apps, notes in _export_batches(user_id):
+        for a in apps:
+            joined = "\n\n".join(f"[{_jsonable(n.created_at)}] {n.content}" for n in notes[a.application_id])
+            writer.writerow([*(_jsonable(getattr(a, f)) for f in LIST_FIELDS), joined])
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():  # header only: no applications
+        yield buf.getvalue().encode()
+
+
+@router.get("/export")
+async def export_applications(
+    current_user: models.User = Depends(get_current_user_id),
+    format: Literal["csv", "ndjson"] = "csv",
+):
+    """Stream every application (with its notes) as CSV or NDJSON, oldest first."""
+    body = _export_csv if format == "csv" else _export_ndjson
+    filename = f"applications-{datetime.now(timezone.utc):%Y%m%d}.{format}"
+    return StreamingResponse(
+        body(current_user.user_id),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": files.content_disposition_for(filename)},
+    )
 
 
 @router.get("/{application_id}")
-def get_application(
+async def get_application(
     application_id: str,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return _get_owned_app(db, current_user.user_id, application_id)
+    return await _get_owned_app(db, current_user.user_id, application_id)
+
+
+@router.get("/{application_id}/detail", response_model=schemas.ApplicationDetailOut)
+async def get_application_detail(
+    application_id: str,
+    request: Request,
+    response: Response,
+    current_user: models.User = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+    presign: Literal["inline", "attachment"] | None = Query(
+        None, description="also return signed view URLs for the linked resume/CV"
+    ),
+):
+    """Application + notes + linked resume/CV: one joined query plus one IN-load for notes."""
+    # Signed URLs expire, so only the plain payload can be revalidated with a 304
+    if not presign:
+        if unchanged := await versions.not_modified(request, response, db, current_user.user_id):
+            return unchanged
+
+    app = (
+        await db.execute(
+            select(models.Application)
+            .options(
+                joinedload(models.Application.resume),
+                joinedload(models.Application.cv),
+                selectinload(models.Application.notes),
+            )
+            .where(
+                models.Application.application_id == application_id,
+                models.Application.user_id == current_user.user_id,
+            )
+        )
+    ).scalar_one_or_none()
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    out = {f: getattr(app, f) for f in schemas.ApplicationOut.model_fields}
+    out["status"] = app.status or analytics.DEFAULT_STATUS
+    out["notes"] = [
+        {f: getattr(n, f) for f in schemas.NoteOut.model_fields}
+        for n in sorted(app.notes, key=lambda n: n.created_at, reverse=True)
+    ]
+    r, cv = app.resume, app.cv
+    out["resume"] = r and {f: getattr(r, f) for f in schemas.ResumeOut.model_fields}
+    out["cv"] = cv and {f: getattr(cv, f) for f in schemas.CVOut.model_fields}
+
+    if presign:
+        from botocore.exceptions import ClientError  # only needed once we sign
+
+        for field, rec, url in (("resume_view_url", r, r and r.resume_url), ("cv_view_url", cv, cv and cv.cv_url)):
+            if not url or rec.upload_status != verification.VERIFIED:
+                continue
+            key = files.key_from_url(url)
+            name = files.download_name_for(key, rec.label, rec.file_name)
+            try:
+                out[field] = files.presigned_get_url(key, name, presign)
+            except ClientError as e:
+                msg = e.response.get("Error", {}).get("Message", "Cannot presign download")
+                raise HTTPException(status_code=500, detail=msg)
+    return out
 
 
 @router.patch("/{application_id}")
-def update_application(
+async def update_application(
     application_id: str,
     patch: schemas.ApplicationUpdate,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    app = _get_owned_app(db, current_user.user_id, application_id)
+    data = patch.model_dump(exclude_unset=True)
+    if not data:
+        return await _get_owned_app(db, current_user.user_id, application_id)
 
-    data = patch.dict(exclude_unset=True)
-    for k, v in data.items():
-        setattr(app, k, v)
-
-    db.commit()
-    db.refresh(app)
-    return app
+    seq = await versions.bump(db, current_user.user_id)
+    row = await _update_owned(db, current_user.user_id, application_id, data, seq)
+    await analytics.apply_deltas(
+        db, current_user.user_id, analytics.status_change(row.created_at, row.old_status, row.status)
+    )
+    await db.commit()
+    return _app_out(row)
 
 
 @router.post("/{application_id}/move", status_code=204)
-def move_status(
+async def move_status(
     application_id: str,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     new_status: str = Query(..., description="New status value"),
 ):
     if new_status not in ALLOWED_STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    app = _get_owned_app(db, current_user.user_id, application_id)
-    app.status = new_status
-    db.commit()
+    seq = await versions.bump(db, current_user.user_id)
+    row = await _update_owned(db, current_user.user_id, application_id, {"status": new_status}, seq)
+    await analytics.apply_deltas(
+        db, current_user.user_id, analytics.status_change(row.created_at, row.old_status, new_status)
+    )
+    await db.commit()
     return None
 
 
 @router.delete("/{application_id}", status_code=204)
-def delete_application(
+async def delete_application(
     application_id: str,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    app = _get_owned_app(db, current_user.user_id, application_id)
-    db.delete(app)
-    db.commit()
+    # Notes go with it via the ON DELETE CASCADE foreign key
+    seq = await versions.bump(db, current_user.user_id)
+    stmt = (
+        delete(models.Application)
+        .where(*_owned(current_user.user_id, application_id))
+        .returning(models.Application.application_id, models.Application.created_at, models.Application.status)
+        .execution_options(synchronize_session=False)
+    )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    await sync.record_deletes(db, current_user.user_id, sync.APPLICATION, [row.application_id], seq)
+    await analytics.apply_deltas(db, current_user.user_id, analytics.deltas_for([row], sign=-1))
+    await db.commit()
     return None
 
+# -------------------- Bulk operations --------------------
+# Bulk moves/deletes run in chunks of BULK_CHUNK_SIZE rows, each its own
+# transaction (data version, rows and rollup deltas together), so a "select all
+# matching" over thousands of rows never holds their locks for the whole run.
+# Chunks walk the matching rows in application_id order.
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+
+def _bulk_conditions(dialect: str, user_id: str, payload: schemas.BulkTarget) -> list:
+    Application = models.Application
+    conds = [Application.user_id == user_id]
+    if payload.ids is not None:
+        return conds + [Application.application_id.in_([str(i) for i in payload.ids])]
+
+    f = payload.filter
+    q = (f.q or "").strip()
+    if q:
+        conds.append(search.search_filter(dialect, q))
+    if f.status_eq and f.status_eq != "all":
+        conds.append(Application.status == f.status_eq)
+    if f.applied_from:
+        conds.append(Application.applied_date >= f.applied_from)
+    if f.applied_to:
+        conds.append(Application.applied_date <= f.applied_to)
+    if f.exclude_ids:
+        conds.append(Application.application_id.not_in([str(i) for i in f.exclude_ids]))
+    return conds
+
+
+def _chunk(conds: list, after: str | None):
+    """Ids of the next chunk of matching rows, locked until the chunk's commit."""
+    id_col = models.Application.application_id
+    query = select(id_col).where(*conds)
+    if after is not None:
+        query = query.where(id_col > after)
+    return query.order_by(id_col).limit(BULK_CHUNK_SIZE).with_for_update()
+
+
+async def _move_chunk(db: AsyncSession, conds: list, after: str | None, seq: int, new_status: str):
+    """Move one chunk; returns its rows as (application_id, created_at, old_status)."""
+    Application = models.Application
+    if db.bind.dialect.name != "postgresql":
+        # No RETURNING from a joined table: read the old statuses first
+        before = (
+            await db.execute(
+                select(Application.application_id, Application.created_at, Application.status.label("old_status"))
+                .where(Application.application_id.in_(_chunk(conds, after).scalar_subquery()))
+            )
+        ).all()
+        if before:
+            await db.execute(
+                update(Application)
+                .where(Application.application_id.in_([r.application_id for r in before]))
+                .values(status=new_status, change_seq=seq)
+                .execution_options(synchronize_session=False)
+            )
+        return before
+
+    locked = _chunk(conds, after).add_columns(Application.status.label("old_status")).subquery()
+    stmt = (
+        update(Application)
+        .where(Application.application_id == locked.c.application_id)
+        .values(status=new_status, change_seq=seq)
+        .returning(Application.application_id, Application.created_at, locked.c.old_status)
+        .execution_options(synchronize_session=False)
+    )
+    return (await db.execute(stmt)).all()
+
+
+async def _delete_chunk(db: AsyncSession, user_id: str, conds: list, after: str | None, seq: int):
+    """Delete and tombstone one chunk (notes cascade); returns its rows as (application_id, created_at, status)."""
+    Application = models.Application
+    stmt = (
+        delete(Application)
+        .where(Application.application_id.in_(_chunk(conds, after).scalar_subquery()))
+        .returning(Application.application_id, Application.created_at, Application.status)
+        .execution_options(synchronize_session=False)
+    )
+    rows = (await db.execute(stmt)).all()
+    await sync.record_deletes(db, user_id, sync.APPLICATION, [r.application_id for r in rows], seq)
+    return rows
+
+
+async def _run_chunks(db: AsyncSession, user_id: str, run_chunk, deltas_for) -> tuple[int, int]:
+    """Run `run_chunk(after, seq)` until the rows run out, committing each; returns (rows, chunks)."""
+    total = chunks = 0
+    after = None
+    while True:
+        seq = await versions.bump(db, user_id)
+        rows = await run_chunk(after, seq)
+        if not rows:
+            await db.rollback()  # nothing changed: keep the version
+            break
+        await analytics.apply_deltas(db, user_id, deltas_for(rows))
+        await db.commit()
+        total += len(rows)
+        chunks += 1
+        if len(rows) < BULK_CHUNK_SIZE:
+            break
+        after = max(r.application_id for r in rows)
+    return total, chunks
+
+
 @router.post("/bulk-move")
-def bulk_move(
+async def bulk_move(
     payload: schemas.BulkMoveIn,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(models.Application).filter(
-        models.Application.user_id == current_user.user_id,
-        models.Application.application_id.in_(payload.ids),
+    """Set the status of the given `ids`, or of every application matching `filter`."""
+    conds = _bulk_conditions(db.bind.dialect.name, current_user.user_id, payload)
+
+    def deltas_for(rows):
+        deltas = analytics.Deltas()
+        for row in rows:
+            deltas.update(analytics.status_change(row.created_at, row.old_status, payload.status))
+        return deltas
+
+    updated, chunks = await _run_chunks(
+        db, current_user.user_id,
+        lambda after, seq: _move_chunk(db, conds, after, seq, payload.status),
+        deltas_for,
     )
-    updated = q.update({"status": payload.status}, synchronize_session=False)
-    db.commit()
     return {
-        "requested_count": len(payload.ids),
+        "requested_count": len(payload.ids) if payload.ids is not None else updated,
         "updated_count": updated,
+        "chunks": chunks,
     }
 
 
 @router.post("/bulk-delete")
-def bulk_delete(
+async def bulk_delete(
     payload: schemas.BulkDeleteIn,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(models.Application).filter(
-        models.Application.user_id == current_user.user_id,
-        models.Application.application_id.in_(payload.ids),
+    """Delete the given `ids`, or every application matching `filter`."""
+    conds = _bulk_conditions(db.bind.dialect.name, current_user.user_id, payload)
+    deleted, chunks = await _run_chunks(
+        db, current_user.user_id,
+        lambda after, seq: _delete_chunk(db, current_user.user_id, conds, after, seq),
+        lambda rows: analytics.deltas_for(rows, sign=-1),
     )
-    deleted = q.delete(synchronize_session=False)
-    db.commit()
     return {
-        "requested_count": len(payload.ids),
+        "requested_count": len(payload.ids) if payload.ids is not None else deleted,
         "deleted_count": deleted,
-    }
\ No newline at end of file
+        "chunks": chunks,
+    }
+
+
+def _foreign_key_violation(e: IntegrityError) -> bool:
+    """23503 on Postgres; SQLite only has the message."""
+    code = getattr(e.orig, "sqlstate", None) or getattr(e.orig, "pgcode", None)
+    return code == "23503" or "FOREIGN KEY constraint failed" in str(e.orig)
+
+
+async def _bulk_update_values(db: AsyncSession, user_id: str, items: list[dict], seq: int) -> list:
+    """
+    Apply per-row patches in one UPDATE ... FROM (VALUES ...) (Postgres).
+
+    Each patched column gets a VALUES column; when only some rows set it, a
+    `set_<column>` flag column picks between the new and the current value, so
+    rows with different field sets still share the statement. Rows come back
+    with `old_status` from a locked self-join, as in `_update_owned`.
+    """
+    Application = models.Application
+    fields = [c.key for c in APP_COLUMNS if c.key != "application_id" and any(c.key in item for item in items)]
+    flagged = [f for f in fields if not all(f in item for item in items)]
+
+    cols = [column("application_id", Application.application_id.type)]
+    cols += [column(f, Application.__table__.c[f].type) for f in fields]
+    cols += [column(f"set_{f}", Boolean) for f in flagged]
+    rows = [
+        (item["application_id"], *(item.get(f) for f in fields), *(f in item for f in flagged))
+        for item in items
+    ]
+    patch = values(*cols, name="patch").data(rows)
+
+    locked = (
+        select(Application.application_id, Application.status.label("old_status"))
+        .where(Application.user_id == user_id, Application.application_id.in_([i["application_id"] for i in items]))
+        .with_for_update()
+        .subquery()
+    )
+    # Cast: a VALUES column that is NULL in every row would otherwise be typed text
+    new = {f: cast(patch.c[f], Application.__table__.c[f].type) for f in fields}
+    sets = {
+        f: case((patch.c[f"set_{f}"], new[f]), else_=getattr(Application, f)) if f in flagged else new[f]
+        for f in fields
+    }
+    sets["change_seq"] = seq
+    stmt = (
+        update(Application)
+        .where(
+            Application.application_id == locked.c.application_id,
+            Application.application_id == patch.c.application_id,
+        )
+        .values(**sets)
+        .returning(*APP_COLUMNS, locked.c.old_status)
+        .execution_options(synchronize_session=False)
+    )
+    return (await db.execute(stmt)).all()
+
+
+async def _bulk_update_rows(db: AsyncSession, user_id: str, items: list[dict], seq: int) -> list:
+    """Portable fallback: one `_update_owned` per row, in the caller's transaction."""
+    out = []
+    for item in items:
+        data = {k: v for k, v in item.items() if k != "application_id"}
+        try:
+            if data:
+                out.append(await _update_owned(db, user_id, item["application_id"], data, seq))
+            else:
+                app = await _get_owned_app(db, user_id, item["application_id"])
+                out.append(SimpleNamespace(**_app_out(app), old_status=app.status))
+        except HTTPException:
+            continue
+    return out
+
+
+@router.post("/bulk-update", response_model=list[schemas.BulkUpdateItemOut])
+async def bulk_update(
+    payload: schemas.BulkUpdateIn,
+    current_user: models.User = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    PATCH many applications, each with its own fields, in one transaction.
+    Results come back in request order; ids the user doesn't own get "not found".
+    """
+    items = [
+        {**item.model_dump(exclude_unset=True, exclude={"application_id"}), "application_id": str(item.application_id)}
+        for item in payload.items
+    ]
+    seq = await versions.bump(db, current_user.user_id)
+    try:
+        if db.bind.dialect.name == "postgresql" and any(len(item) > 1 for item in items):
+            rows = await _bulk_update_values(db, current_user.user_id, items, seq)
+        else:
+            rows = await _bulk_update_rows(db, current_user.user_id, items, seq)
+    except IntegrityError as e:
+        await db.rollback()
+        if _foreign_key_violation(e):
+            raise HTTPException(status_code=409, detail="A resume_id or cv_id does not exist")
+        raise HTTPException(status_code=422, detail="An update violates a database constraint")
+
+    if rows:
+        deltas = analytics.Deltas()
+        for row in rows:
+            deltas.update(analytics.status_change(row.created_at, row.old_status, row.status))
+        await analytics.apply_deltas(db, current_user.user_id, deltas)
+        await db.commit()
+    else:
+        await db.rollback()  # nothing changed: keep the version
+
+    by_id = {row.application_id: row for row in rows}
+    return [
+        {"application_id": item["application_id"], "application": _app_out(by_id[item["application_id"]])}
+        if item["application_id"] in by_id
+        else {"application_id": item["application_id"], "error": "not found"}
+        for item in items
+    ]
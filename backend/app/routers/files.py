@@ -1,17 +1,19 @@
 # app/routers/files.py
-from fastapi import APIRouter, HTTPException, status, Query, Request, Depends
-from sqlalchemy.orm import Session
-from app.deps import get_db  # keep DB dependency only
-from app import schemas, models
-from botocore.config import Config
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Query, Request, Response, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.deps import get_async_db  # keep DB dependency only
+from app import schemas, models, purge, verification, versions
+from app.cache import TTLCache
 from urllib.parse import urlparse
 from urllib.parse import quote as urlquote
-from botocore.exceptions import ClientError
+from functools import lru_cache
 from typing import Literal
 from sqlalchemy.exc import IntegrityError
 
-# NEW: imports for S3 presign + utils
-import os, re, uuid, mimetypes, boto3, requests
+import io, os, re, uuid, mimetypes, zipfile
+from datetime import datetime, timezone
 
 router = APIRouter(prefix="/files", tags=["files"])
 
@@ -19,18 +21,32 @@ router = APIRouter(prefix="/files", tags=["files"])
 S3_BUCKET   = os.getenv("S3_BUCKET_NAME")
 S3_REGION   = os.getenv("S3_REGION")
 CDN_DOMAIN  = os.getenv("S3_CLOUDFRONT_DOMAIN")  
+S3_ENDPOINT = os.getenv("S3_ENDPOINT_URL")  # local S3 stand-in (MinIO, moto server, ...)
 MAX_SIZE    = 10 * 1024 * 1024  # 10 MB hard cap
+PRESIGN_GET_TTL = 60 * 5
+# Signed GET URLs are reused until this many seconds before they expire
+SIGNED_URL_MARGIN     = int(os.getenv("SIGNED_URL_MARGIN", "60"))
+SIGNED_URL_CACHE_SIZE = int(os.getenv("SIGNED_URL_CACHE_SIZE", "10000"))
+_signed_urls = TTLCache("signed_urls", maxsize=SIGNED_URL_CACHE_SIZE, ttl=PRESIGN_GET_TTL)
 ALLOWED_CT  = {
     "application/pdf",
     "application/msword",
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
 }
 
-s3 = boto3.client(
-    "s3",
-    region_name=S3_REGION,
-    config=Config(signature_version="s3v4", s3={"addressing_style": "virtual"}),
-)
+@lru_cache(maxsize=1)
+def get_s3():
+    """S3 client, built on first use so cold starts that never touch S3 skip importing boto3."""
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "s3",
+        region_name=S3_REGION,
+        endpoint_url=S3_ENDPOINT,
+        # Stand-ins on localhost can't do bucket subdomains
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path" if S3_ENDPOINT else "virtual"}),
+    )
 
 # -------------------- Helpers --------------------
 SAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
@@ -94,21 +110,72 @@ def key_from_url(url: str) -> str:
     p = urlparse(url)
     return p.path.lstrip("/")  # everything after the first '/'
 
-def verify_s3_object(url: str, max_size: int = MAX_SIZE):
-    """Verify uploaded object using AWS credentials."""
-    key = key_from_url(url)
+# head_object error codes that mean the upload isn't there (it never will be, for this key)
+MISSING_OBJECT_CODES = {"404", "NoSuchKey", "NotFound"}
+
+def object_problem(key: str, max_size: int = MAX_SIZE) -> str | None:
+    """
+    Check an uploaded object using AWS credentials; None if it is acceptable,
+    else why it is rejected (blocking). Errors that don't say anything about the
+    object itself (throttling, 5xx, 403, network) are raised, not reported.
+    """
+    from botocore.exceptions import ClientError  # loaded with boto3 by get_s3()
+
     try:
-        head = s3.head_object(Bucket=S3_BUCKET, Key=key)
-        size = int(head.get("ContentLength", 0))
-        ct = (head.get("ContentType") or "").lower()
-
-        if size <= 0 or size > max_size:
-            raise HTTPException(status_code=400, detail=f"Invalid object size: {size} bytes")
-        if ct not in ALLOWED_CT:
-            raise HTTPException(status_code=400, detail=f"Unexpected content type: {ct}")
+        head = get_s3().head_object(Bucket=S3_BUCKET, Key=key)
     except ClientError as e:
-        msg = e.response.get("Error", {}).get("Message", "Access denied")
-        raise HTTPException(status_code=400, detail=f"Upload verification failed: {msg}")
+        if e.response.get("Error", {}).get("Code") not in MISSING_OBJECT_CODES:
+            raise
+        return "Upload not found"
+    size = int(head.get("ContentLength", 0))
+    ct = (head.get("ContentType") or "").lower()
+    if size <= 0 or size > max_size:
+        return f"Invalid object size: {size} bytes"
+    if ct not in ALLOWED_CT:
+        return f"Unexpected content type: {ct}"
+    return None
+
+def _owned_upload_key(url: str, user_id: str) -> str:
+    key = key_from_url(url)
+    if not key.startswith(f"{user_id}/"):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if key.endswith("/"):  # the user's prefix (or a "folder"), not an uploaded object
+        raise HTTPException(status_code=422, detail="URL does not point at an uploaded file")
+    return key
+
+def _require_verified(rec) -> None:
+    if rec.upload_status != verification.VERIFIED:
+        raise HTTPException(status_code=409, detail="Upload is still being verified")
+
+def download_name_for(key: str, label: str | None = None, original_name: str | None = None) -> str:
+    """Prefer the label, then the original file name; keep the stored object's extension."""
+    _, key_ext = os.path.splitext(key)
+    preferred = (label or original_name or os.path.basename(key)) or "download"
+    return safe_download_name(preferred, fallback_ext=key_ext)
+
+def presigned_get_url(key: str, download_name: str, disposition: str = "attachment", expires: int = PRESIGN_GET_TTL) -> str:
+    """
+    Signed GET URL (computed locally, no S3 round trip); raises ClientError.
+    Cached per (key, name, disposition) and reused until SIGNED_URL_MARGIN
+    seconds before it expires.
+    """
+    cache_key = (key, download_name, disposition, expires)
+    url = _signed_urls.get(cache_key)
+    if url is None:
+        url = get_s3().generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": S3_BUCKET,
+                "Key": key,
+                "ResponseContentDisposition": (
+                    f'{disposition}; filename="{download_name}"; '
+                    f"filename*=UTF-8''{urlquote(download_name, safe='')}"
+                ),
+            },
+            ExpiresIn=expires,
+        )
+        _signed_urls.set(cache_key, url, ttl=expires - SIGNED_URL_MARGIN)
+    return url
 
 # -------------------- Presign --------------------
 @router.post("/presign")
@@ -135,7 +202,7 @@ def presign_upload(
         ]
         fields = {"Content-Type": ct}
 
-        presigned = s3.generate_presigned_post(
+        presigned = get_s3().generate_presigned_post(
             Bucket=S3_BUCKET,
             Key=key,
             Fields=fields,
@@ -157,14 +224,14 @@ def presign_upload(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/presign-get")
-def presign_get(
+async def presign_get(
     request: Request,
     kind: Literal["resume", "cv"] | None = None,
     item_id: str | None = None,
     key: str | None = None,
     url: str | None = None,
     disposition: Literal["inline", "attachment"] = "attachment",  # NEW
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Return a short-lived, signed GET URL for downloading a private object.
@@ -179,22 +246,24 @@ def presign_get(
 
     if kind and item_id:
         if kind == "resume":
-            rec = db.query(models.Resume).filter(
+            rec = (await db.execute(select(models.Resume).where(
                 models.Resume.resume_id == item_id,
                 models.Resume.user_id == user_id
-            ).first()
+            ))).scalar_one_or_none()
             if not rec:
                 raise HTTPException(status_code=404, detail="Resume not found")
+            _require_verified(rec)
             obj_url = rec.resume_url
             label = getattr(rec, "label", None)
             original_name = rec.file_name
         elif kind == "cv":
-            rec = db.query(models.CV).filter(
+            rec = (await db.execute(select(models.CV).where(
                 models.CV.cv_id == item_id,
                 models.CV.user_id == user_id
-            ).first()
+            ))).scalar_one_or_none()
             if not rec:
                 raise HTTPException(status_code=404, detail="CV not found")
+            _require_verified(rec)
             obj_url = rec.cv_url
             label = getattr(rec, "label", None)
             original_name = rec.file_name
@@ -215,176 +284,343 @@ def presign_get(
     if not key.startswith(f"{user_id}/"):
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    # Decide final download name:
-    # 1) prefer label (user-friendly), else original file_name
-    # 2) ensure it has the right extension (fall back from key)
-    _, key_ext = os.path.splitext(key)
-    # If we know the content type, we could map to an ext; key_ext is fine for now
-    preferred = (label or original_name or os.path.basename(key)) or "download"
-    friendly_name = safe_download_name(preferred, fallback_ext=key_ext)
+    # Decide final download name: label, else original file_name, with the key's extension
+    friendly_name = download_name_for(key, label, original_name)
+
+    from botocore.exceptions import ClientError
 
     try:
-        signed = s3.generate_presigned_url(
-            "get_object",
-            Params={
-                "Bucket": S3_BUCKET,
-                "Key": key,
-                # Use requested disposition
-                "ResponseContentDisposition": (
-                    f'{disposition}; filename="{friendly_name}"; '
-                    f"filename*=UTF-8''{urlquote(friendly_name, safe='')}"
-                ),
-            },
-            ExpiresIn=60 * 5,
-        )
+        signed = presigned_get_url(key, friendly_name, disposition)
         return {"url": signed}
     except ClientError as e:
         msg = e.response.get("Error", {}).get("Message", "Cannot presign download")
         raise HTTPException(status_code=500, detail=msg)
 
+@router.post("/presign-get/batch", response_model=list[schemas.PresignedItemOut])
+async def presign_get_batch(
+    request: Request,
+    payload: schemas.PresignGetBatchIn,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Signed GET URLs for many (kind, item_id) pairs, in request order: one query per
+    table, and per-item errors instead of failing the whole batch.
+    """
+    user_id = _require_user_id(request)
+
+    wanted = {"resume": set(), "cv": set()}
+    for item in payload.items:
+        wanted[item.kind].add(item.item_id)
+
+    found: dict[tuple[str, str], tuple] = {}
+    if wanted["resume"]:
+        rows = await db.execute(
+            select(models.Resume.resume_id, models.Resume.resume_url, models.Resume.label,
+                   models.Resume.file_name, models.Resume.upload_status)
+            .where(models.Resume.user_id == user_id, models.Resume.resume_id.in_(wanted["resume"]))
+        )
+        found.update((("resume", r[0]), r[1:]) for r in rows)
+    if wanted["cv"]:
+        rows = await db.execute(
+            select(models.CV.cv_id, models.CV.cv_url, models.CV.label, models.CV.file_name, models.CV.upload_status)
+            .where(models.CV.user_id == user_id, models.CV.cv_id.in_(wanted["cv"]))
+        )
+        found.update((("cv", r[0]), r[1:]) for r in rows)
+
+    out = []
+    from botocore.exceptions import ClientError
+
+    for item in payload.items:
+        result = {"kind": item.kind, "item_id": item.item_id}
+        rec = found.get((item.kind, item.item_id))
+        if not rec or not rec[0]:
+            result["error"] = "not found"
+        elif rec[3] != verification.VERIFIED:
+            result["error"] = "pending"
+        else:
+            url, label, file_name, _ = rec
+            key = key_from_url(url)
+            if not key.startswith(f"{user_id}/"):
+                result["error"] = "forbidden"
+            else:
+                try:
+                    result["url"] = presigned_get_url(
+                        key, download_name_for(key, label, file_name), payload.disposition
+                    )
+                except ClientError as e:
+                    result["error"] = e.response.get("Error", {}).get("Message", "Cannot presign download")
+        out.append(result)
+    return out
+
+# -------------------- Download all (ZIP) --------------------
+ZIP_CHUNK = 256 * 1024
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, unseekable buffer the ZipFile writes into; drained after every chunk."""
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def _archive_name(folder: str, name: str, taken: set[str]) -> str:
+    root, ext = os.path.splitext(name)
+    candidate, n = f"{folder}/{name}", 1
+    while candidate.lower() in taken:
+        n += 1
+        candidate = f"{folder}/{root} ({n}){ext}"
+    taken.add(candidate.lower())
+    return candidate
+
+def _zip_documents(entries: list[tuple[str, str]]):
+    """
+    Yield a ZIP archive of (archive name, S3 key) entries, one S3 chunk at a time.
+
+    Blocking (boto3); StreamingResponse iterates it in a worker thread. Since the
+    output is unseekable, ZipFile writes sizes/CRCs in data descriptors, so no
+    file or archive is ever held whole. Objects that can't be read are listed in
+    MISSING.txt instead of failing the (already started) download.
+    """
+    from botocore.exceptions import ClientError
+
+    sink = _ZipSink()
+    missing = []
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for name, key in entries:
+            try:
+                body = get_s3().get_object(Bucket=S3_BUCKET, Key=key)["Body"]
+            except ClientError:
+                missing.append(name)
+                continue
+            try:
+                with zf.open(name, "w") as dest:
+                    for chunk in body.iter_chunks(ZIP_CHUNK):
+                        dest.write(chunk)
+                        yield sink.drain()
+            finally:
+                body.close()
+            yield sink.drain()
+        if missing:
+            zf.writestr("MISSING.txt", "Could not be read from storage:\n" + "\n".join(missing) + "\n")
+    yield sink.drain()
+
+@router.get("/archive")
+async def download_all(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Stream every verified resume and CV the user has as one ZIP (resumes/, cover-letters/)."""
+    user_id = _require_user_id(request)
+
+    resumes = (await db.execute(
+        select(models.Resume.resume_url, models.Resume.label, models.Resume.file_name)
+        .where(models.Resume.user_id == user_id, models.Resume.upload_status == verification.VERIFIED)
+        .order_by(models.Resume.uploaded_at, models.Resume.resume_id)
+    )).all()
+    cvs = (await db.execute(
+        select(models.CV.cv_url, models.CV.label, models.CV.file_name)
+        .where(models.CV.user_id == user_id, models.CV.upload_status == verification.VERIFIED)
+        .order_by(models.CV.uploaded_at, models.CV.cv_id)
+    )).all()
+
+    entries, taken = [], set()
+    for folder, rows in (("resumes", resumes), ("cover-letters", cvs)):
+        for url, label, file_name in rows:
+            key = key_from_url(url)
+            if not key.startswith(f"{user_id}/"):
+                continue
+            entries.append((_archive_name(folder, download_name_for(key, label, file_name), taken), key))
+
+    archive = f"documents-{datetime.now(timezone.utc):%Y%m%d}.zip"
+    return StreamingResponse(
+        _zip_documents(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition_for(archive)},
+    )
+
 # -------------------- Resumes --------------------
 @router.post("/resumes", response_model=schemas.ResumeOut, status_code=201)
-def create_resume(
+async def create_resume(
     request: Request,
     meta: schemas.FileMetaIn,
-    db: Session = Depends(get_db),
+    tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
 ):
     user_id = _require_user_id(request)
-    verify_s3_object(meta.url)
-    rec = models.Resume(user_id=user_id, resume_url=meta.url, file_name=meta.file_name, label=meta.label)
-    db.add(rec); db.commit(); db.refresh(rec)
+    key = _owned_upload_key(meta.url, user_id)
+    rec = models.Resume(user_id=user_id, resume_url=meta.url, file_name=meta.file_name, label=meta.label,
+                        upload_status=verification.PENDING)
+    db.add(rec); await versions.bump(db, user_id)
+    await db.commit(); await db.refresh(rec)
+    verification.enqueue(key, tasks)
     return schemas.ResumeOut(
         resume_id=rec.resume_id, file_name=rec.file_name, label=rec.label,
-        resume_url=rec.resume_url, uploaded_at=rec.uploaded_at
+        resume_url=rec.resume_url, uploaded_at=rec.uploaded_at, upload_status=rec.upload_status
     )
 
 @router.get("/resumes", response_model=list[schemas.ResumeOut])
-def list_resumes(
+async def list_resumes(
     request: Request,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
 ):
     user_id = _require_user_id(request)
-
-    rows = (db.query(models.Resume)
-              .filter(models.Resume.user_id == user_id)
-              .order_by(models.Resume.uploaded_at.desc())
-              .all())
+    if unchanged := await versions.not_modified(request, response, db, user_id):
+        return unchanged
+
+    rows = (await db.execute(
+        select(models.Resume)
+        .where(models.Resume.user_id == user_id)
+        .order_by(models.Resume.uploaded_at.desc())
+    )).scalars().all()
     return [
         schemas.ResumeOut(
             resume_id=r.resume_id,
             file_name=r.file_name,
             label=r.label,
             resume_url=r.resume_url,
-            uploaded_at=r.uploaded_at
+            uploaded_at=r.uploaded_at,
+            upload_status=r.upload_status,
         )
         for r in rows
     ]
 
 @router.delete("/resumes/{resume_id}", status_code=204)
-def delete_resume(
+async def delete_resume(
     request: Request,
     resume_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     user_id = _require_user_id(request)
 
-    r = (
-        db.query(models.Resume)
-        .filter(
+    r = (await db.execute(
+        select(models.Resume).where(
             models.Resume.resume_id == resume_id,
             models.Resume.user_id == user_id,
         )
-        .first()
-    )
+    )).scalar_one_or_none()
     if not r:
         raise HTTPException(status_code=404, detail="Resume not found")
 
-    linked_q = db.query(models.Application).filter(
-        models.Application.user_id == user_id,
-        models.Application.resume_id == resume_id,
+    seq = await versions.bump(db, user_id)
+    await db.execute(
+        update(models.Application)
+        .where(
+            models.Application.user_id == user_id,
+            models.Application.resume_id == resume_id,
+        )
+        .values(resume_id=None, change_seq=seq)
+        .execution_options(synchronize_session=False)
     )
 
-    linked_q.update({models.Application.resume_id: None}, synchronize_session=False)
-
-    db.delete(r)
+    await db.delete(r)
+    job = purge.job_for(user_id, key_from_url(r.resume_url)) if r.resume_url else None
+    if job:
+        db.add(job)
 
     try:
-        db.commit()
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=409,
             detail="Resume is still referenced by other records and cannot be deleted.",
         )
 
-    if r.resume_url:
-        key = key_from_url(r.resume_url)
-        try:
-            s3.delete_object(Bucket=S3_BUCKET, Key=key)
-        except ClientError:
-            pass
+    if job:
+        purge.enqueue(job.job_id)
     return
 
 # -------------------- CV --------------------
 @router.post("/cv", response_model=schemas.CVOut, status_code=201)
-def create_cv(
+async def create_cv(
     request: Request,
     meta: schemas.FileMetaIn,
-    db: Session = Depends(get_db),
+    tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
 ):
     user_id = _require_user_id(request)
 
-    verify_s3_object(meta.url)  # 
-    rec = models.CV(user_id=user_id, cv_url=meta.url, file_name=meta.file_name, label=meta.label)
-    db.add(rec); db.commit(); db.refresh(rec)
+    key = _owned_upload_key(meta.url, user_id)
+    rec = models.CV(user_id=user_id, cv_url=meta.url, file_name=meta.file_name, label=meta.label,
+                    upload_status=verification.PENDING)
+    db.add(rec); await versions.bump(db, user_id)
+    await db.commit(); await db.refresh(rec)
+    verification.enqueue(key, tasks)
     return schemas.CVOut(
         cv_id=rec.cv_id, file_name=rec.file_name, label=rec.label,
-        cv_url=rec.cv_url, uploaded_at=rec.uploaded_at
+        cv_url=rec.cv_url, uploaded_at=rec.uploaded_at, upload_status=rec.upload_status
     )
 
 @router.get("/cv", response_model=list[schemas.CVOut])
-def list_cv(
+async def list_cv(
     request: Request,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
 ):
     user_id = _require_user_id(request)
-
-    rows = (db.query(models.CV)
-              .filter(models.CV.user_id == user_id)
-              .order_by(models.CV.uploaded_at.desc())
-              .all())
+    if unchanged := await versions.not_modified(request, response, db, user_id):
+        return unchanged
+
+    rows = (await db.execute(
+        select(models.CV)
+        .where(models.CV.user_id == user_id)
+        .order_by(models.CV.uploaded_at.desc())
+    )).scalars().all()
     return [
         schemas.CVOut(
             cv_id=r.cv_id,
             file_name=r.file_name,
             label=r.label,
             cv_url=r.cv_url,
-            uploaded_at=r.uploaded_at
+            uploaded_at=r.uploaded_at,
+            upload_status=r.upload_status,
         )
         for r in rows
     ]
 
 @router.delete("/cv/{cv_id}", status_code=204)
-def delete_cv(
+async def delete_cv(
     request: Request,
     cv_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     user_id = _require_user_id(request)
 
-    r = db.query(models.CV).filter(
+    r = (await db.execute(select(models.CV).where(
         models.CV.cv_id == cv_id,
         models.CV.user_id == user_id
-    ).first()
+    ))).scalar_one_or_none()
     if not r:
         raise HTTPException(404, "CV not found")
 
-    if r.cv_url:
-        key = key_from_url(r.cv_url)
-        try:
-            s3.delete_object(Bucket=S3_BUCKET, Key=key)
-        except ClientError:
-            pass
+    # Unlink explicitly (rather than leave it to ON DELETE SET NULL) so the
+    # applications' change_seq moves on for delta sync
+    seq = await versions.bump(db, user_id)
+    await db.execute(
+        update(models.Application)
+        .where(
+            models.Application.user_id == user_id,
+            models.Application.cv_id == cv_id,
+        )
+        .values(cv_id=None, change_seq=seq)
+        .execution_options(synchronize_session=False)
+    )
+
+    await db.delete(r)
+    job = purge.job_for(user_id, key_from_url(r.cv_url)) if r.cv_url else None
+    if job:
+        db.add(job)
+    await db.commit()
 
-    db.delete(r)
-    db.commit()
+    if job:
+        purge.enqueue(job.job_id)
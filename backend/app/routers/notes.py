@@ -1,133 +1,148 @@
 # app/routers/notes.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app import models, schemas
-from app.deps import get_db, get_current_user_id
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import delete, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas, sync, versions
+from app.deps import get_async_db, get_current_user_id
 import uuid
 from datetime import datetime, timezone
 
 router = APIRouter(prefix="/applications/{application_id}/notes", tags=["notes"])
 
+Note = models.ApplicationNote
+NOTE_COLUMNS = tuple(c for c in Note.__table__.c if c.key != "change_seq")
+
+def _owned_note(application_id: str, note_id: str, user_id: str):
+    return (
+        Note.note_id == note_id,
+        Note.application_id == application_id,
+        Note.user_id == user_id,
+    )
+
+def _note_out(row) -> dict:
+    return {c.key: getattr(row, c.key) for c in NOTE_COLUMNS}
+
 @router.post("", response_model=schemas.NoteOut, status_code=201)
-def create_note(
+async def create_note(
     application_id: str,
     payload: schemas.NoteCreate,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    app = (
-        db.query(models.Application)
-        .filter(
-            models.Application.application_id == application_id,
-            models.Application.user_id == current_user.user_id,
-        )
-        .first()
+    # INSERT ... SELECT FROM application: the ownership check and the insert are one
+    # statement, and no row comes back if the user doesn't own the application
+    seq = await versions.bump(db, current_user.user_id)
+    values = {
+        "note_id": str(uuid.uuid4()),
+        "user_id": current_user.user_id,
+        "content": (payload.content or "").strip(),
+        "created_at": datetime.now(timezone.utc),
+    }
+    source = select(
+        literal(values["note_id"], Note.note_id.type),
+        models.Application.application_id,
+        literal(values["user_id"], Note.user_id.type),
+        literal(values["content"], Note.content.type),
+        literal(values["created_at"], Note.created_at.type),
+        literal(seq, Note.change_seq.type),
+    ).where(
+        models.Application.application_id == application_id,
+        models.Application.user_id == current_user.user_id,
     )
-    if not app:
-        raise HTTPException(404, "Application not found")
-
-    note = models.ApplicationNote(
-        note_id=str(uuid.uuid4()),
-        application_id=application_id,
-        user_id=current_user.user_id,
-        content=(payload.content or "").strip(),
-        created_at=datetime.now(timezone.utc),
+    stmt = (
+        insert(Note)
+        .from_select(["note_id", "application_id", "user_id", "content", "created_at", "change_seq"], source)
+        .returning(*NOTE_COLUMNS)
     )
-    db.add(note)
-    db.commit()
-    db.refresh(note)
-    return note
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        raise HTTPException(404, "Application not found")
+    await db.commit()
+    return _note_out(row)
 
 @router.get("", response_model=list[schemas.NoteOut])
-def list_notes(
+async def list_notes(
     application_id: str,
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    # Version first: a 304 never touches the application tables. Deleting the
+    # application bumps the version, so a stale ETag can't revalidate it.
+    if unchanged := await versions.not_modified(request, response, db, current_user.user_id):
+        return unchanged
     app = (
-        db.query(models.Application)
-        .filter(
-            models.Application.application_id == application_id,
-            models.Application.user_id == current_user.user_id,
+        await db.execute(
+            select(models.Application.application_id).where(
+                models.Application.application_id == application_id,
+                models.Application.user_id == current_user.user_id,
+            )
         )
-        .first()
-    )
+    ).first()
     if not app:
         raise HTTPException(404, "Application not found")
 
     return (
-        db.query(models.ApplicationNote)
-        .filter(
-            models.ApplicationNote.application_id == application_id,
-            models.ApplicationNote.user_id == current_user.user_id,
+        await db.execute(
+            select(models.ApplicationNote)
+            .where(
+                models.ApplicationNote.application_id == application_id,
+                models.ApplicationNote.user_id == current_user.user_id,
+            )
+            .order_by(models.ApplicationNote.created_at.desc())
         )
-        .order_by(models.ApplicationNote.created_at.desc())
-        .all()
-    )
+    ).scalars().all()
 
 @router.delete("/{note_id}", status_code=204)
-def delete_note(
+async def delete_note(
     application_id: str,
     note_id: str,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    note = (
-        db.query(models.ApplicationNote)
-        .filter(
-            models.ApplicationNote.note_id == note_id,
-            models.ApplicationNote.application_id == application_id,
-            models.ApplicationNote.user_id == current_user.user_id,
-        )
-        .first()
+    seq = await versions.bump(db, current_user.user_id)
+    stmt = (
+        delete(Note)
+        .where(*_owned_note(application_id, note_id, current_user.user_id))
+        .returning(Note.note_id)
+        .execution_options(synchronize_session=False)
     )
-    if not note:
+    gone = (await db.execute(stmt)).first()
+    if gone is None:
         raise HTTPException(404, "Note not found")
-    db.delete(note)
-    db.commit()
+    await sync.record_deletes(db, current_user.user_id, sync.NOTE, [gone.note_id], seq)
+    await db.commit()
 
 @router.patch("/{note_id}", response_model=schemas.NoteOut)
-def update_note(
+async def update_note(
     application_id: str,
     note_id: str,
     payload: schemas.NoteCreate,
     current_user: models.User = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # Ensure the application belongs to the current user
-    app_row = (
-        db.query(models.Application)
-        .filter(
-            models.Application.application_id == application_id,
-            models.Application.user_id == current_user.user_id,
-        )
-        .first()
-    )
-    if not app_row:
-        raise HTTPException(status_code=404, detail="Application not found")
-
-    note = (
-        db.query(models.ApplicationNote)
-        .filter(
-            models.ApplicationNote.note_id == note_id,
-            models.ApplicationNote.application_id == application_id,
-            models.ApplicationNote.user_id == current_user.user_id,
-        )
-        .first()
-    )
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-
     new_content = (payload.content or "").strip()
     if not new_content:
         raise HTTPException(status_code=400, detail="Content cannot be empty")
 
-    note.content = new_content
+    # Notes carry their owner's user_id, so one scoped UPDATE covers the ownership check
     try:
-        db.commit()
-        db.refresh(note)
+        seq = await versions.bump(db, current_user.user_id)
+        row = (await db.execute(
+            update(Note)
+            .where(*_owned_note(application_id, note_id, current_user.user_id))
+            .values(content=new_content, change_seq=seq)
+            .returning(*NOTE_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Note not found")
+        await db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=f"Could not update note: {e}")
 
-    return note
+    return _note_out(row)
@@ -1,14 +1,15 @@
 # backend/routers/users.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from app.deps import get_db, get_current_user_id
-from app import models, schemas
+from app.deps import get_db, get_current_user_id, invalidate_principal
+from app import models, purge, schemas
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/me", response_model=schemas.UserOut)
-def me(user_id: str = Depends(get_current_user_id), db: Session = Depends(get_db)):
-    user = db.query(models.User).get(user_id)
+def me(current_user = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    user = db.get(models.User, current_user.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return schemas.UserOut(
@@ -18,19 +19,29 @@ def me(user_id: str = Depends(get_current_user_id), db: Session = Depends(get_db
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 def delete_me(
     confirm: bool = Query(False, description="Set true to confirm account deletion"),
-    user_id: str = Depends(get_current_user_id),
+    current_user = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
     if not confirm:
         raise HTTPException(status_code=400, detail="Pass ?confirm=true to delete your account.")
 
-    user = db.query(models.User).filter(models.User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
+    # One DELETE: the database cascades to applications, notes, files and stats
+    # (ON DELETE CASCADE); the user's S3 objects go in a background purge job.
     try:
-        db.delete(user)
-        db.commit()   # relies on FK ON DELETE CASCADE / ORM cascade to clean children
+        deleted = db.execute(
+            delete(models.User).where(models.User.user_id == current_user.user_id).returning(models.User.user_id)
+        ).scalar_one_or_none()
+        if not deleted:
+            raise HTTPException(status_code=404, detail="User not found")
+        job = purge.job_for_account(deleted)
+        job_id = job.job_id  # the session expires it on commit
+        db.add(job)
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Could not delete user: {e}")
+    invalidate_principal(current_user)
+    purge.enqueue(job_id)
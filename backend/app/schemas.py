@@ -1,7 +1,7 @@
 # backend/schemas.py
 from typing import Optional, List, Literal
 from datetime import date, datetime
-from pydantic import BaseModel, EmailStr, conlist, Field
+from pydantic import BaseModel, EmailStr, conlist, Field, model_validator
 from uuid import UUID
 
 # ---------- Auth ----------
@@ -32,6 +32,7 @@ class ResumeOut(BaseModel):
     label: Optional[str]
     resume_url: str
     uploaded_at: datetime
+    upload_status: Literal["pending", "verified"] = "verified"
 
 class CVOut(BaseModel):
     cv_id: str
@@ -39,6 +40,21 @@ class CVOut(BaseModel):
     label: Optional[str]
     cv_url: str
     uploaded_at: datetime
+    upload_status: Literal["pending", "verified"] = "verified"
+
+class PresignGetItem(BaseModel):
+    kind: Literal["resume", "cv"]
+    item_id: str
+
+class PresignGetBatchIn(BaseModel):
+    items: List[PresignGetItem] = Field(..., min_items=1, max_items=200)
+    disposition: Literal["inline", "attachment"] = "attachment"
+
+class PresignedItemOut(BaseModel):
+    kind: Literal["resume", "cv"]
+    item_id: str
+    url: Optional[str] = None
+    error: Optional[str] = None     # "not found" / "pending" / "forbidden" / signing failure
 
 # ---------- Applications ----------
 class ApplicationCreate(BaseModel):
@@ -61,6 +77,25 @@ class ApplicationUpdate(BaseModel):
     resume_id: Optional[str] = None
     cv_id: Optional[str] = None
 
+    @model_validator(mode="after")
+    def _company_not_null(self):
+        # Omit company to leave it alone; the column is NOT NULL
+        if "company" in self.model_fields_set and self.company is None:
+            raise ValueError("company cannot be null")
+        return self
+
+class BulkUpdateItem(ApplicationUpdate):
+    application_id: UUID
+
+class BulkUpdateIn(BaseModel):
+    items: List[BulkUpdateItem] = Field(..., min_items=1, max_items=500)
+
+    @model_validator(mode="after")
+    def _unique_ids(self):
+        if len({i.application_id for i in self.items}) != len(self.items):
+            raise ValueError("Each application_id may appear only once")
+        return self
+
 class ApplicationOut(BaseModel):
     application_id: str
     company: str
@@ -73,12 +108,68 @@ class ApplicationOut(BaseModel):
     resume_id: Optional[str]
     cv_id: Optional[str]
 
-class BulkMoveIn(BaseModel):
-    ids: List[UUID] = Field(..., min_items=1, max_items=200)
+class ApplicationSummaryOut(BaseModel):
+    """List row: every field optional so `fields=` can trim it; no description by default."""
+    application_id: str
+    company: Optional[str] = None
+    job_title: Optional[str] = None
+    job_description: Optional[str] = None
+    job_website: Optional[str] = None
+    status: Optional[str] = None
+    applied_date: Optional[date] = None
+    created_at: Optional[datetime] = None
+    resume_id: Optional[str] = None
+    cv_id: Optional[str] = None
+
+class MonthlyStatsOut(BaseModel):
+    month: date                 # first day of the month (UTC)
+    new: int                    # applications created that month
+    applied: int
+    interviewing: int
+    offer: int
+    rejected: int
+    in_progress: int            # applied + interviewing
+
+class ImportRowError(BaseModel):
+    line: int                   # first physical line of the record in the upload
+    error: str
+
+class ImportResultOut(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
+    aborted: Optional[str] = None   # set if the upload stopped being parseable part-way
+
+class BulkUpdateItemOut(BaseModel):
+    application_id: str
+    application: Optional[ApplicationOut] = None
+    error: Optional[str] = None     # "not found"
+
+class BulkFilter(BaseModel):
+    """Select-all-matching: the list endpoint's filters, minus any deselected rows."""
+    q: Optional[str] = None
+    status_eq: Optional[str] = None             # omitted or "all": any status
+    applied_from: Optional[date] = None         # inclusive
+    applied_to: Optional[date] = None           # inclusive
+    exclude_ids: List[UUID] = Field(default_factory=list, max_items=5000)
+
+class BulkTarget(BaseModel):
+    """Either explicit `ids` or a `filter`, not both."""
+    ids: Optional[List[UUID]] = Field(None, min_items=1, max_items=200)
+    filter: Optional[BulkFilter] = None
+
+    @model_validator(mode="after")
+    def _one_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide either ids or filter")
+        return self
+
+class BulkMoveIn(BulkTarget):
     status: Literal["applied", "interviewing", "offer", "rejected"]
 
-class BulkDeleteIn(BaseModel):
-    ids: List[UUID] = Field(..., min_items=1, max_items=200)
+class BulkDeleteIn(BulkTarget):
+    pass
 
 # ---------- Notes ----------
 class NoteCreate(BaseModel):
@@ -89,3 +180,21 @@ class NoteOut(BaseModel):
     application_id: str
     content: str
     created_at: datetime
+
+# ---------- Application detail ----------
+class ApplicationDetailOut(ApplicationOut):
+    """One-shot payload for the application info page."""
+    notes: List[NoteOut]
+    resume: Optional[ResumeOut] = None
+    cv: Optional[CVOut] = None
+    resume_view_url: Optional[str] = None   # only with ?presign=
+    cv_view_url: Optional[str] = None
+
+# ---------- Delta sync ----------
+class ChangesOut(BaseModel):
+    cursor: str                             # pass as ?since= next time
+    reset: bool = False                     # full snapshot: replace the local copy
+    applications: List[ApplicationOut]      # created or updated since the cursor
+    notes: List[NoteOut]
+    deleted_applications: List[str]         # their notes are gone too
+    deleted_notes: List[str]
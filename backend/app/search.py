@@ -0,0 +1,71 @@
+# app/search.py
+"""
+Application search.
+
+On Postgres, `application.search_vector` is a stored, generated tsvector over
+company/title/description (GIN indexed) for ranked full-text matches, and
+company/job_title carry pg_trgm GIN indexes so substring (ILIKE) and
+typo-tolerant (`%`) matches are index-backed too.
+
+Other dialects (SQLite test databases) fall back to portable LIKE predicates
+and a simple field-weighted relevance score. POSTGRES_DDL is applied by
+app.migrations.
+"""
+from sqlalchemy import case, func, literal_column, or_
+
+from app.models import Application
+
+TS_CONFIG = literal_column("'english'::regconfig")
+SEARCH_VECTOR = literal_column("application.search_vector")
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE application ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(company, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(job_title, '')), 'B') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(job_description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_application_search_vector ON application USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_application_company_trgm ON application USING GIN (company gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_application_job_title_trgm ON application USING GIN (job_title gin_trgm_ops)",
+]
+
+
+def _tsquery(q: str):
+    return func.websearch_to_tsquery(TS_CONFIG, q)
+
+
+def search_filter(dialect: str, q: str):
+    """WHERE predicate matching `q` against company/title/description."""
+    like = f"%{q}%"
+    if dialect == "postgresql":
+        return or_(
+            SEARCH_VECTOR.op("@@")(_tsquery(q)),
+            Application.company.ilike(like),
+            Application.job_title.ilike(like),
+            Application.company.op("%")(q),
+            Application.job_title.op("%")(q),
+        )
+    return or_(
+        Application.company.ilike(like),
+        Application.job_title.ilike(like),
+        Application.job_description.ilike(like),
+    )
+
+
+def search_rank(dialect: str, q: str):
+    """Relevance score for `q`; higher is better."""
+    if dialect == "postgresql":
+        return func.ts_rank_cd(SEARCH_VECTOR, _tsquery(q)) + func.greatest(
+            func.similarity(Application.company, q),
+            func.similarity(func.coalesce(Application.job_title, ""), q),
+        )
+    like = f"%{q}%"
+    return (
+        case((Application.company.ilike(like), 3), else_=0)
+        + case((Application.job_title.ilike(like), 2), else_=0)
+        + case((Application.job_description.ilike(like), 1), else_=0)
+    )
@@ -0,0 +1,85 @@
+# app/sync.py
+"""
+Delta sync for clients that keep a local copy of their applications and notes.
+
+Every application and note row carries `change_seq`: the user's data version
+(app.versions) committed by the last transaction that wrote it. Deletes leave a
+`sync_tombstones` row stamped the same way. `GET /applications/changes?since=`
+returns rows and tombstones with a change_seq above the cursor's version, plus
+a new cursor.
+
+Cursors are opaque to clients: base64url(JSON [version, issued_at epoch]).
+Tombstones are compacted after TOMBSTONE_RETENTION_DAYS; a cursor older than
+that (less a day's margin) may have missed deletes, so it gets a full snapshot
+with `reset: true` instead of a delta.
+
+    python -m app.sync compact [--older-than-days N]
+
+A scheduled {"task": "compact-tombstones"} Lambda event runs the same compaction.
+"""
+import argparse, base64, json, os, time
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import SyncTombstone
+
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+CURSOR_MAX_AGE = (TOMBSTONE_RETENTION_DAYS - 1) * 86400  # seconds
+COMPACT_TASK = "compact-tombstones"
+
+APPLICATION, NOTE = "application", "note"
+
+
+def encode_cursor(version: int) -> str:
+    raw = json.dumps([version, int(time.time())], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    """(version, issued_at); 400 if the cursor wasn't made by `encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        version, issued_at = json.loads(base64.urlsafe_b64decode(padded))
+        return int(version), int(issued_at)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def expired(issued_at: int) -> bool:
+    return time.time() - issued_at > CURSOR_MAX_AGE
+
+
+async def record_deletes(db: AsyncSession, user_id: str, kind: str, entity_ids, seq: int) -> None:
+    """Tombstone deleted rows, in the deleting transaction; `seq` is the version its `bump` returned."""
+    rows = [
+        {"entity_id": entity_id, "kind": kind, "user_id": user_id, "change_seq": seq}
+        for entity_id in entity_ids
+    ]
+    if rows:
+        await db.execute(insert(SyncTombstone).values(rows))
+
+
+def compact(older_than_days: int = TOMBSTONE_RETENTION_DAYS) -> dict:
+    """Drop tombstones older than the retention window (blocking)."""
+    from app.db import engine
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    with engine.begin() as conn:
+        removed = conn.execute(delete(SyncTombstone).where(SyncTombstone.deleted_at < cutoff)).rowcount
+    return {"removed": removed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delta sync maintenance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_compact = sub.add_parser("compact", help="delete tombstones past the retention window")
+    p_compact.add_argument("--older-than-days", type=int, default=TOMBSTONE_RETENTION_DAYS)
+    args = parser.parse_args()
+    print(f"Removed {compact(args.older_than_days)['removed']} tombstone(s).")
+
+
+if __name__ == "__main__":
+    main()
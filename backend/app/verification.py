@@ -0,0 +1,187 @@
+# app/verification.py
+"""
+Upload verification, off the request path.
+
+`create_resume` / `create_cv` store the record as `pending` and hand its object
+key to `enqueue`. `verify_key` HEADs the object: a valid size and content type
+flips the record to `verified`; a missing object, bad size or bad content type
+deletes the record (and the object, via app.purge). Either way the owner's
+data version moves on, so clients polling the list see the change. When S3
+can't answer (throttling, 5xx, 403, network), the record stays `pending` and
+the next `sweep` tries again.
+
+VERIFY_MODE selects who does the work:
+
+  local     (default outside Lambda) an in-process queue drained by a worker
+            thread - the stand-in for S3 event notifications when running
+            under uvicorn
+  s3-event  (default on Lambda, where a thread is frozen once the response
+            is returned) the registering request verifies its own upload in
+            a background task, which Mangum runs before the invocation ends:
+            the client registers after its upload, so the object is normally
+            there and one HEAD settles it. The bucket's ObjectCreated
+            notifications invoke the Lambda handler, which calls
+            `handle_s3_event`, for uploads that land after their record; a
+            scheduled {"task": "verify-sweep"} event runs `sweep` for records
+            whose check S3 couldn't answer.
+  sweep     nothing per request and no notifications: records stay `pending`
+            until the scheduled `sweep`, i.e. for up to SWEEP_AFTER plus the
+            schedule's interval (the check scripts use it to keep S3 out of
+            request counts)
+
+    python -m app.verification sweep [--older-than SECONDS]
+"""
+import argparse, logging, os, queue, threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import unquote_plus
+
+from fastapi import BackgroundTasks
+from sqlalchemy import delete, select, update
+
+from app import models, purge, versions
+from app.db import engine
+
+log = logging.getLogger(__name__)
+
+VERIFY_MODE = os.getenv(
+    "VERIFY_MODE", "s3-event" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "local"
+)  # "local" | "s3-event" | "sweep"
+SWEEP_AFTER = int(os.getenv("VERIFY_SWEEP_AFTER", "60"))  # seconds a record may stay pending
+
+PENDING, VERIFIED = "pending", "verified"
+SWEEP_TASK = "verify-sweep"
+
+# (model, URL column) for every table that stores uploaded objects
+KINDS = ((models.Resume, models.Resume.resume_url), (models.CV, models.CV.cv_url))
+# model -> (its id, the application column that links to it)
+LINKS = {
+    models.Resume: (models.Resume.resume_id, models.Application.resume_id),
+    models.CV: (models.CV.cv_id, models.Application.cv_id),
+}
+
+
+def verify_key(key: str) -> int:
+    """Settle every pending record that points at `key`; returns how many."""
+    from app.routers import files
+
+    owner = key.split("/", 1)[0]
+    problem = files.object_problem(key)
+    settled = 0
+    with engine.connect() as conn:
+        # Bump first, as every writer does (see app.versions); rolled back if nothing was pending
+        seq = versions.bump_sync(conn, owner)
+        for model, url_col in KINDS:
+            match = (
+                model.user_id == owner,  # keys are "<user_id>/...": stays on the user index
+                model.upload_status == PENDING,
+                url_col.endswith("/" + key, autoescape=True),
+            )
+            if problem:
+                # PATCH can link a pending upload; unlink it here rather than through
+                # ON DELETE SET NULL so delta sync sees the applications change
+                id_col, link_col = LINKS[model]
+                conn.execute(
+                    update(models.Application)
+                    .where(models.Application.user_id == owner, link_col.in_(select(id_col).where(*match)))
+                    .values({link_col.key: None, "change_seq": seq})
+                )
+                stmt = delete(model).where(*match).returning(model.user_id)
+            else:
+                stmt = update(model).where(*match).values(upload_status=VERIFIED).returning(model.user_id)
+            settled += len(conn.execute(stmt).all())
+        job_id = purge.job_for_sync(conn, owner, key) if problem and settled else None
+        if settled:
+            conn.commit()
+        else:
+            conn.rollback()
+    if job_id:
+        log.info("Rejected upload %s: %s", key, problem)
+        purge.enqueue(job_id)
+    return settled
+
+
+def _verify_or_defer(key: str) -> int:
+    """`verify_key`, leaving the records pending (for the next sweep) if S3 or the DB fails."""
+    try:
+        return verify_key(key)
+    except Exception:
+        log.exception("Verification of %s failed; it stays pending for the sweep", key)
+        return 0
+
+
+def handle_s3_event(event: dict) -> dict:
+    """Lambda entry for S3 ObjectCreated notifications."""
+    settled = 0
+    for record in event.get("Records", []):
+        if record.get("eventSource") == "aws:s3" and record.get("eventName", "").startswith("ObjectCreated"):
+            settled += _verify_or_defer(unquote_plus(record["s3"]["object"]["key"]))
+    return {"settled": settled}
+
+
+def is_s3_event(event) -> bool:
+    records = event.get("Records") if isinstance(event, dict) else None
+    return bool(records) and records[0].get("eventSource") == "aws:s3"
+
+
+def sweep(older_than: int = SWEEP_AFTER) -> dict:
+    """Verify records left pending for more than `older_than` seconds (missed or early events)."""
+    from app.routers import files
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than)
+    with engine.connect() as conn:
+        urls = [
+            url
+            for model, url_col in KINDS
+            for url in conn.execute(
+                select(url_col).where(model.upload_status == PENDING, model.uploaded_at < cutoff)
+            ).scalars()
+        ]
+    return {"settled": sum(_verify_or_defer(files.key_from_url(url)) for url in urls)}
+
+
+# -------------------- Local queue (VERIFY_MODE=local) --------------------
+_queue: "queue.Queue[str]" = queue.Queue()
+_worker: threading.Thread | None = None
+_worker_lock = threading.Lock()
+
+
+def _drain() -> None:
+    while True:
+        key = _queue.get()
+        try:
+            _verify_or_defer(key)
+        finally:
+            _queue.task_done()
+
+
+def enqueue(key: str, tasks: BackgroundTasks) -> None:
+    """Schedule verification of a just-registered upload (no-op when only the sweep drives it)."""
+    global _worker
+    if VERIFY_MODE == "s3-event":
+        tasks.add_task(_verify_or_defer, key)
+    if VERIFY_MODE != "local":
+        return
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_drain, name="upload-verifier", daemon=True)
+                _worker.start()
+    _queue.put(key)
+
+
+def wait_idle() -> None:
+    """Block until the local queue is empty (scripts / smoke checks)."""
+    _queue.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Settle pending uploads.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_sweep = sub.add_parser("sweep", help="verify records pending for too long")
+    p_sweep.add_argument("--older-than", type=int, default=SWEEP_AFTER, help="seconds")
+    args = parser.parse_args()
+    print(f"Settled {sweep(args.older_than)['settled']} pending upload(s).")
+
+
+if __name__ == "__main__":
+    main()
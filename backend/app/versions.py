@@ -0,0 +1,90 @@
+# app/versions.py
+"""
+Per-user data version for conditional GETs.
+
+`users.data_version` is bumped (`bump`) in the same transaction as every write
+to a user's applications, notes or files. List endpoints derive a weak ETag
+from it plus the user id, request path and query string (`not_modified`), so
+a matching `If-None-Match` is answered with 304 after a single primary-key
+lookup on `users`, without touching the application tables. Responses carry
+`Vary: Authorization` so shared caches keep each user's copy apart.
+
+The version doubles as the change sequence for delta sync: rows written in a
+transaction are stamped with the version its `bump` returns. Writers bump
+before touching any other row, so the user's row is the first lock every
+write takes: concurrent writers for a user queue there, never on each other's
+application rows, and each stamps the version it commits.
+"""
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+
+CACHE_CONTROL = "private, no-cache"  # always revalidate; 304s keep that cheap
+VARY = "Authorization"  # the same URL is a different list for every user
+
+
+async def bump(db: AsyncSession, user_id: str) -> int:
+    """Advance the user's data version; caller commits with the write it covers. Returns the new version."""
+    return (
+        await db.execute(
+            update(User)
+            .where(User.user_id == user_id)
+            .values(data_version=User.data_version + 1)
+            .returning(User.data_version)
+            .execution_options(synchronize_session=False)
+        )
+    ).scalar_one_or_none() or 0
+
+
+def bump_sync(conn: Connection, user_id: str) -> int:
+    """`bump` for the sync engine (background verification, maintenance commands)."""
+    return conn.execute(
+        update(User)
+        .where(User.user_id == user_id)
+        .values(data_version=User.data_version + 1)
+        .returning(User.data_version)
+    ).scalar_one_or_none() or 0
+
+
+async def current(db: AsyncSession, user_id: str) -> int:
+    version = (
+        await db.execute(select(User.data_version).where(User.user_id == user_id))
+    ).scalar_one_or_none()
+    return version or 0
+
+
+def etag_for(request: Request, user_id: str, version: int) -> str:
+    # The user is part of the tag: two users can be at the same version
+    target = f"{user_id}\n{request.url.path}?{request.url.query}"
+    digest = hashlib.sha1(target.encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110): the W/ prefix is ignored
+    opaque = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == opaque for t in if_none_match.split(","))
+
+
+async def not_modified(
+    request: Request, response: Response, db: AsyncSession, user_id: str
+) -> Response | None:
+    """
+    Set ETag/Cache-Control on `response`; return a 304 response if the client's
+    copy is current, else None (the endpoint then builds the body as usual).
+    """
+    etag = etag_for(request, user_id, await current(db, user_id))
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": VARY}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,74 @@
+# scripts/bench_auth.py
+"""
+Micro-benchmark: per-request auth CPU with and without the verified-claims cache.
+
+Signs tokens with a throwaway RSA key (cognito mode) and with SECRET_KEY
+(local mode), then times `_verify_cognito` / `_decode_local_jwt` with the
+cache cleared before every call ("cold") and with the cache warm.
+
+    python scripts/bench_auth.py [-n 2000]
+
+No network or database access: the JWKS fetch is stubbed with the local key.
+"""
+import argparse, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("COGNITO_REGION", "us-east-1")
+os.environ.setdefault("USER_POOL_ID", "us-east-1_bench")
+os.environ.setdefault("APP_CLIENT_ID", "bench-client")
+
+import rsa
+from jose import jwk, jwt
+
+from app import deps
+
+
+def _cognito_token() -> str:
+    _, priv = rsa.newkeys(2048)
+    pem = priv.save_pkcs1().decode()
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    public.update(kid="bench", use="sig", alg="RS256")
+    deps._jwks_store()._fetch = lambda url, timeout: {"keys": [public]}
+    claims = {
+        "sub": "bench-user", "iss": deps.COGNITO_ISSUER, "aud": deps.APP_CLIENT_ID,
+        "token_use": "id", "email_verified": True, "exp": int(time.time()) + 3600,
+    }
+    return jwt.encode(claims, pem, algorithm="RS256", headers={"kid": "bench"})
+
+
+def _local_token() -> str:
+    claims = {"sub": "bench-user", "exp": int(time.time()) + 3600}
+    return jwt.encode(claims, deps.SECRET_KEY, algorithm=deps.ALGORITHM)
+
+
+def _cpu_per_call(fn, token: str, n: int, cold: bool) -> float:
+    fn(token)  # prime the JWKS store / imports
+    total = 0.0
+    for _ in range(n):
+        if cold:
+            deps._claims.clear()
+        start = time.process_time()
+        fn(token)
+        total += time.process_time() - start
+    return total / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Auth CPU per request, cold vs cached.")
+    parser.add_argument("-n", type=int, default=2000, help="calls per measurement")
+    args = parser.parse_args()
+
+    cases = [
+        ("cognito", deps._verify_cognito, _cognito_token()),
+        ("local", deps._decode_local_jwt, _local_token()),
+    ]
+    print(f"{'mode':<8} {'uncached us':>12} {'cached us':>10} {'speedup':>8}")
+    for name, fn, token in cases:
+        cold = _cpu_per_call(fn, token, args.n, cold=True) * 1e6
+        warm = _cpu_per_call(fn, token, args.n, cold=False) * 1e6
+        print(f"{name:<8} {cold:>12.1f} {warm:>10.1f} {cold / warm:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
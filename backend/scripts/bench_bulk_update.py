@@ -0,0 +1,99 @@
+# scripts/bench_bulk_update.py
+"""
+Bulk patch benchmark: N `PATCH /applications/{id}` calls vs one
+`POST /applications/bulk-update` carrying the same N per-row patches.
+
+Run the API under uvicorn (against Postgres, so the bulk call takes the
+UPDATE ... FROM (VALUES ...) path), then:
+
+    python scripts/bench_bulk_update.py --base http://127.0.0.1:8000 \\
+        --token <dev user_id or JWT> [--rows 100] [--rounds 5]
+
+Creates --rows applications for the user, then each round re-dates and
+re-titles every one of them both ways (different values per row), checking
+that the two approaches leave identical rows. The applications are deleted
+at the end.
+"""
+import argparse, statistics, time
+from datetime import date, timedelta
+
+import httpx
+
+
+def patches(ids: list[str], round_no: int) -> list[dict]:
+    """A different applied_date and title per row (and per round); every third row also moves."""
+    out = []
+    for i, app_id in enumerate(ids):
+        patch = {
+            "application_id": app_id,
+            "applied_date": (date(2026, 1, 1) + timedelta(days=i + round_no)).isoformat(),
+            "job_title": f"Role {i}.{round_no}",
+        }
+        if i % 3 == 0:
+            patch["status"] = ("applied", "interviewing")[round_no % 2]
+        out.append(patch)
+    return out
+
+
+def per_row(http: httpx.Client, items: list[dict]) -> dict:
+    result = {}
+    for item in items:
+        body = {k: v for k, v in item.items() if k != "application_id"}
+        r = http.patch(f"/applications/{item['application_id']}", json=body)
+        r.raise_for_status()
+        result[item["application_id"]] = r.json()
+    return result
+
+
+def bulk(http: httpx.Client, items: list[dict]) -> dict:
+    r = http.post("/applications/bulk-update", json={"items": items})
+    r.raise_for_status()
+    return {row["application_id"]: row["application"] for row in r.json()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bulk-update against per-row PATCH calls.")
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", required=True, help="dev user_id (AUTH_MODE=dev-noverify) or JWT")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    with httpx.Client(base_url=args.base, headers=headers, timeout=120) as http:
+        ids = [
+            http.post("/applications", json={"company": f"Bench {i}"}).json()["application_id"]
+            for i in range(args.rows)
+        ]
+        timings = {"per-row PATCH": [], "bulk-update": []}
+        try:
+            for round_no in range(args.rounds):
+                items = patches(ids, round_no)
+                start = time.perf_counter()
+                looped = per_row(http, items)
+                timings["per-row PATCH"].append(time.perf_counter() - start)
+
+                # Reset to the previous round's values so the bulk call does the same work
+                per_row(http, patches(ids, round_no - 1))
+                start = time.perf_counter()
+                batched = bulk(http, items)
+                timings["bulk-update"].append(time.perf_counter() - start)
+
+                # PATCH also echoes user_id; compare the fields bulk-update returns
+                if any({f: looped[i][f] for f in row} != row for i, row in batched.items()):
+                    raise SystemExit(f"round {round_no}: bulk-update and per-row PATCH results differ")
+        finally:
+            for start in range(0, len(ids), 200):
+                http.post("/applications/bulk-delete", json={"ids": ids[start:start + 200]})
+
+    print(f"{args.rows} rows, {args.rounds} rounds (median wall time per round)")
+    print(f"{'method':<16} {'ms':>9} {'ms/row':>9}")
+    for method, samples in timings.items():
+        ms = statistics.median(samples) * 1000
+        print(f"{method:<16} {ms:>9.1f} {ms / args.rows:>9.2f}")
+    speedup = statistics.median(timings["per-row PATCH"]) / statistics.median(timings["bulk-update"])
+    print(f"bulk-update is {speedup:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# scripts/bench_coldstart.py
+"""
+Cold-start benchmark for the Lambda entry point.
+
+Each run starts a fresh interpreter (like a new Lambda sandbox) and reports:
+  * `python -X importtime` for `import app.main`, grouped by top-level package
+  * time from interpreter start to the first `/health` response through the
+    Mangum handler, and to the first warm-up ping
+
+    python scripts/bench_coldstart.py [--runs 5] [--top 15]
+
+Set DATABASE_URL etc. as for the app; /health and warm-up pings do not touch
+the database or S3.
+"""
+import argparse, json, os, statistics, subprocess, sys
+from collections import defaultdict
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+HEALTH_EVENT = {
+    "version": "2.0",
+    "routeKey": "$default",
+    "rawPath": "/health",
+    "rawQueryString": "",
+    "headers": {"host": "localhost"},
+    "requestContext": {
+        "http": {"method": "GET", "path": "/health", "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1"},
+        "stage": "$default",
+    },
+    "isBase64Encoded": False,
+}
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app.main as m
+t_import = time.perf_counter()
+r = m.handler(json.loads(sys.argv[1]), None)
+t_first = time.perf_counter()
+assert r["statusCode"] == 200, r
+m.handler({"source": "aws.events"}, None)
+t_warm = time.perf_counter()
+print(json.dumps({"import": t_import - t0, "first_response": t_first - t0, "warm_ping": t_warm - t_first}))
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = BACKEND + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("DATABASE_URL", "sqlite://")
+    return env
+
+
+def importtime_breakdown(top: int) -> None:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND, env=_env(), capture_output=True, text=True, check=True,
+    )
+    by_pkg: dict[str, int] = defaultdict(int)
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        by_pkg[name.split(".")[0]] += int(self_us)
+        total += int(self_us)
+    print(f"import app.main: {total / 1000:.1f} ms total (self time by top-level package)")
+    for pkg, us in sorted(by_pkg.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {pkg:<24} {us / 1000:8.1f} ms")
+
+
+def first_response(runs: int) -> None:
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE, json.dumps(HEALTH_EVENT)],
+            cwd=BACKEND, env=_env(), capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    print(f"\nfresh interpreter -> /health via handler ({runs} runs, median)")
+    for key in ("import", "first_response", "warm_ping"):
+        print(f"  {key:<16} {statistics.median(s[key] for s in samples) * 1000:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start import and first-response timings.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    importtime_breakdown(args.top)
+    first_response(args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# scripts/bench_concurrency.py
+"""
+Concurrency benchmark: req/s and latency percentiles at increasing client counts.
+
+Run the API under uvicorn against Postgres (e.g. one server on the previous,
+sync-router build and one on the current async build), then:
+
+    python scripts/bench_concurrency.py \
+        --target sync=http://127.0.0.1:8001 --target async=http://127.0.0.1:8002 \
+        --token <dev user_id or JWT> [--path "/applications?limit=20"] \
+        [--clients 50 200 1000] [--requests-per-client 20]
+
+Each client issues its requests back to back over a shared connection pool;
+latencies are measured per request, wall time across the whole level.
+"""
+import argparse, asyncio, statistics, time
+
+import httpx
+
+
+async def _client(http: httpx.AsyncClient, url: str, n: int, latencies: list[float], errors: list[int]) -> None:
+    for _ in range(n):
+        start = time.perf_counter()
+        try:
+            r = await http.get(url)
+            ok = r.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            errors.append(1)
+
+
+async def run_level(base: str, path: str, token: str, clients: int, per_client: int) -> dict:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: list[float] = []
+    errors: list[int] = []
+    async with httpx.AsyncClient(base_url=base, headers=headers, limits=limits, timeout=60) as http:
+        await http.get(path)  # warm up auth caches / pool
+        start = time.perf_counter()
+        await asyncio.gather(*(_client(http, path, per_client, latencies, errors) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "errors": len(errors),
+    }
+
+
+async def main_async(args) -> None:
+    print(f"{'target':<10} {'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for spec in args.target:
+        label, _, base = spec.partition("=")
+        if not base:
+            label, base = spec, spec
+        for clients in args.clients:
+            res = await run_level(base, args.path, args.token, clients, args.requests_per_client)
+            print(f"{label:<10} {clients:>7} {res['rps']:>9.1f} {res['p50']:>9.1f} {res['p99']:>9.1f} {res['errors']:>7}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="req/s and p99 latency at 50/200/1000 concurrent clients.")
+    parser.add_argument("--target", action="append", required=True, help="label=http://host:port (repeatable)")
+    parser.add_argument("--token", required=True, help="bearer token (user_id in dev-noverify mode)")
+    parser.add_argument("--path", default="/applications?limit=20")
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--requests-per-client", type=int, default=20)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
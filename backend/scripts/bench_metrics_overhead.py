@@ -0,0 +1,99 @@
+# scripts/bench_metrics_overhead.py
+"""
+What the request instrumentation (app.metrics) costs per request.
+
+Drives the app in-process (no network, so the difference isn't lost in noise)
+with instrumentation off, with metrics only, and with metrics plus the JSON
+request log (written to /dev/null), each in a fresh interpreter since the
+middleware is installed at import time:
+
+    DATABASE_URL=... AUTH_MODE=dev-noverify python scripts/bench_metrics_overhead.py \\
+        [--requests 5000] [--path /health] [--path "/applications?limit=20"]
+
+Paths under /applications are requested as a throwaway user with a few
+applications, so they include the per-statement SQLAlchemy event hooks.
+"""
+import argparse, asyncio, json, os, subprocess, sys, time, uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+ROUNDS = 3
+CONFIGS = {
+    "off": {"METRICS": "0"},
+    "metrics": {"METRICS": "1", "REQUEST_LOG": "0"},
+    "metrics+log": {"METRICS": "1", "REQUEST_LOG": "1"},
+}
+
+
+async def _measure(paths: list[str], n: int) -> dict:
+    import logging
+
+    import httpx
+    from sqlalchemy import insert
+
+    from app import models
+    from app.db import async_session_factory, engine
+    from app.main import app
+    from app.migrations import migrate
+
+    logging.basicConfig(stream=open(os.devnull, "w"), level=logging.INFO)
+    migrate(engine)
+    user_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(insert(models.User).values(user_id=user_id, email=f"{user_id}@example.com"))
+        conn.execute(insert(models.Application), [
+            {"user_id": user_id, "company": f"Bench {i}"} for i in range(20)
+        ])
+
+    out = {}
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {user_id}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        for path in paths:
+            for _ in range(50):  # warm caches, pools, lazy imports
+                (await client.get(path)).raise_for_status()
+            rounds = []
+            for _ in range(ROUNDS):
+                start = time.perf_counter()
+                for _ in range(n):
+                    await client.get(path)
+                rounds.append((time.perf_counter() - start) / n * 1e6)
+            out[path] = min(rounds)  # least disturbed by the rest of the machine
+    await async_session_factory().kw["bind"].dispose()  # aiosqlite's worker thread would keep us alive
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure per-request instrumentation overhead.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    paths = args.paths or ["/health", "/applications?limit=20"]
+
+    if args.child:
+        print(json.dumps(asyncio.run(_measure(paths, args.requests))))
+        return
+
+    results = {}
+    for name, env in CONFIGS.items():
+        cmd = [sys.executable, __file__, "--child", "--requests", str(args.requests)]
+        for path in paths:
+            cmd += ["--path", path]
+        proc = subprocess.run(cmd, env={**os.environ, "AUTH_MODE": "dev-noverify", **env},
+                              capture_output=True, text=True, check=True)
+        results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print(f"{args.requests} requests per path, best of {ROUNDS} (mean µs per request; overhead vs off)")
+    print(f"{'path':<28} " + " ".join(f"{name:>20}" for name in CONFIGS))
+    for path in paths:
+        base = results["off"][path]
+        cells = []
+        for name in CONFIGS:
+            us = results[name][path]
+            cells.append(f"{us:>9.1f}" + ("" if name == "off" else f" ({us - base:+.1f})").rjust(11))
+        print(f"{path:<28} " + " ".join(f"{c:>20}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# scripts/check_data_version.py
+"""
+Fail if a write endpoint does not bump the user's data version, or if a
+conditional GET is not answered with 304.
+
+Drives every mutating route of the applications, notes and files routers
+through the real app and checks `users.data_version` before and after each
+call. Mutating routes without a case here are reported too, so a new write
+endpoint cannot silently skip `versions.bump`.
+
+    DATABASE_URL=... AUTH_MODE=dev-noverify python scripts/check_data_version.py
+
+No request reaches S3: background verification and purging are switched off,
+uploads are registered under the user's own prefix and marked verified
+directly, as in check_query_budgets.py. Deleting a linked resume or CV must
+also stamp the unlinked application's `change_seq` with the new version.
+"""
+import os, sys, uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("AUTH_MODE", "dev-noverify")
+os.environ["VERIFY_MODE"] = "sweep"
+os.environ["PURGE_MODE"] = "scheduled"
+os.environ.setdefault("S3_BUCKET_NAME", "data-version-check")
+os.environ.setdefault("S3_REGION", "us-east-1")
+if not (os.getenv("AWS_ACCESS_KEY_ID") or os.getenv("AWS_PROFILE")):
+    os.environ.update(AWS_ACCESS_KEY_ID="check", AWS_SECRET_ACCESS_KEY="check")
+
+import httpx
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select, update
+
+from app import models, verification
+from app.db import engine
+from app.main import app
+from app.migrations import migrate
+from app.routers import applications, files, notes
+
+NO_DB_WRITE = {("POST", "/files/presign"), ("POST", "/files/presign-get/batch")}
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def version(user_id: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            select(models.User.data_version).where(models.User.user_id == user_id)
+        ).scalar_one()
+
+
+class Checker:
+    def __init__(self, client: TestClient, user_id: str):
+        self.client = client
+        self.user_id = user_id
+        self.covered: set[tuple[str, str]] = set()
+        self.failures: list[str] = []
+
+    def write(self, method: str, route: str, url: str, **kwargs) -> httpx.Response:
+        before = version(self.user_id)
+        r = self.client.request(method, url, **kwargs)
+        after = version(self.user_id)
+        self.covered.add((method, route))
+        if r.status_code >= 400:
+            self.failures.append(f"{method} {route}: HTTP {r.status_code} {r.text[:200]}")
+        elif after <= before:
+            self.failures.append(f"{method} {route}: data_version stayed at {before}")
+        else:
+            print(f"ok   {method:<6} {route}  v{before} -> v{after}")
+        return r
+
+    def conditional(self, url: str) -> None:
+        first = self.client.get(url)
+        etag = first.headers.get("etag")
+        if not etag:
+            self.failures.append(f"GET {url}: no ETag")
+            return
+        again = self.client.get(url, headers={"If-None-Match": etag})
+        if again.status_code != 304:
+            self.failures.append(f"GET {url}: If-None-Match gave {again.status_code}, not 304")
+        else:
+            print(f"ok   GET    {url}  304 on {etag}")
+
+
+    def unlinked(self, route: str, application_id: str) -> None:
+        """After deleting a linked document, the application must carry the new version."""
+        with engine.connect() as conn:
+            seq = conn.execute(
+                select(models.Application.change_seq).where(models.Application.application_id == application_id)
+            ).scalar_one()
+        current = version(self.user_id)
+        if seq != current:
+            self.failures.append(f"DELETE {route}: unlinked application has change_seq {seq}, not v{current}")
+        else:
+            print(f"ok   DELETE {route}  unlinked application at v{seq}")
+
+
+def register(c: Checker, route: str, name: str, model, id_col, id_key: str) -> str:
+    """Register an upload under the user's prefix and mark it verified; returns its id."""
+    url = files.public_url_for(files.object_key_for(c.user_id, name))
+    item_id = c.write("POST", route, route, json={"file_name": name, "url": url}).json()[id_key]
+    with engine.begin() as conn:
+        conn.execute(update(model).where(id_col == item_id).values(upload_status=verification.VERIFIED))
+    return item_id
+
+
+def main() -> None:
+    migrate(engine)
+    user_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(insert(models.User).values(user_id=user_id, email=f"{user_id}@example.com"))
+
+    client = TestClient(app, headers={"Authorization": f"Bearer {user_id}"})
+    c = Checker(client, user_id)
+
+    # Applications
+    a1 = c.write("POST", "/applications", "/applications", json={"company": "Acme"}).json()["application_id"]
+    a2 = c.write("POST", "/applications", "/applications", json={"company": "Beta"}).json()["application_id"]
+    a3 = c.write("POST", "/applications", "/applications", json={"company": "Gamma"}).json()["application_id"]
+    c.write("POST", "/applications/import", "/applications/import",
+            content=b"company,status\nDelta,applied\n", headers={"content-type": "text/csv"})
+    c.conditional("/applications?limit=10")
+    c.conditional(f"/applications/{a1}/notes")
+    c.write("PATCH", "/applications/{application_id}", f"/applications/{a1}", json={"job_title": "Engineer"})
+    c.write("POST", "/applications/{application_id}/move", f"/applications/{a1}/move",
+            params={"new_status": "interviewing"})
+    c.write("POST", "/applications/bulk-update", "/applications/bulk-update",
+            json={"items": [{"application_id": a1, "job_title": "Lead"}, {"application_id": a2, "applied_date": "2026-01-05"}]})
+    c.write("POST", "/applications/bulk-move", "/applications/bulk-move", json={"ids": [a1, a2], "status": "offer"})
+    c.write("POST", "/applications/bulk-move", "/applications/bulk-move",
+            json={"filter": {"q": "Delta", "exclude_ids": [a1]}, "status": "rejected"})
+
+    # Notes
+    n1 = c.write("POST", "/applications/{application_id}/notes", f"/applications/{a1}/notes",
+                 json={"content": "called"}).json()["note_id"]
+    c.write("PATCH", "/applications/{application_id}/notes/{note_id}", f"/applications/{a1}/notes/{n1}",
+            json={"content": "called back"})
+    c.write("DELETE", "/applications/{application_id}/notes/{note_id}", f"/applications/{a1}/notes/{n1}")
+
+    c.write("DELETE", "/applications/{application_id}", f"/applications/{a3}")
+    c.write("POST", "/applications/bulk-delete", "/applications/bulk-delete", json={"ids": [a1, a2]})
+
+    # Files
+    c.conditional("/files/resumes")
+    c.conditional("/files/cv")
+    a4 = c.write("POST", "/applications", "/applications", json={"company": "Epsilon"}).json()["application_id"]
+    r1 = register(c, "/files/resumes", "r.pdf", models.Resume, models.Resume.resume_id, "resume_id")
+    v1 = register(c, "/files/cv", "c.pdf", models.CV, models.CV.cv_id, "cv_id")
+    c.write("PATCH", "/applications/{application_id}", f"/applications/{a4}", json={"resume_id": r1, "cv_id": v1})
+    c.write("DELETE", "/files/resumes/{resume_id}", f"/files/resumes/{r1}")
+    c.unlinked("/files/resumes/{resume_id}", a4)
+    c.write("DELETE", "/files/cv/{cv_id}", f"/files/cv/{v1}")
+    c.unlinked("/files/cv/{cv_id}", a4)
+
+    # Every mutating route must have been exercised
+    checked_prefixes = (applications.router.prefix, notes.router.prefix, files.router.prefix)
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or not route.path.startswith(checked_prefixes):
+            continue
+        for method in route.methods & WRITE_METHODS:
+            if (method, route.path) not in c.covered | NO_DB_WRITE:
+                c.failures.append(f"{method} {route.path}: no data_version check")
+
+    for failure in c.failures:
+        print(f"FAIL {failure}")
+    print(f"{len(c.failures)} failure(s).")
+    sys.exit(1 if c.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# scripts/check_documents_zip.py
+"""
+End-to-end check of GET /files/archive against a local S3 stand-in.
+
+Uploads a few documents to the bucket, registers them for a fresh user,
+downloads the archive through the app and verifies every entry byte for byte
+(plus MISSING.txt for an object that was never uploaded).
+
+    docker run -p 9000:9000 minio/minio server /data      # or: moto_server -p 9000
+    S3_ENDPOINT_URL=http://127.0.0.1:9000 S3_BUCKET_NAME=docs S3_REGION=us-east-1 \\
+    AWS_ACCESS_KEY_ID=minioadmin AWS_SECRET_ACCESS_KEY=minioadmin \\
+    DATABASE_URL=sqlite:////tmp/zipcheck.db AUTH_MODE=dev-noverify \\
+        python scripts/check_documents_zip.py [--size-mb 8]
+"""
+import argparse, io, os, sys, uuid, zipfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("AUTH_MODE", "dev-noverify")
+
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app import models
+from app.db import engine
+from app.main import app
+from app.migrations import migrate
+from app.routers import files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verify the streamed documents ZIP against a local S3.")
+    parser.add_argument("--size-mb", type=int, default=8, help="size of the largest test document")
+    args = parser.parse_args()
+    if not files.S3_ENDPOINT:
+        sys.exit("Set S3_ENDPOINT_URL to a local S3 stand-in (MinIO, moto server, ...)")
+
+    s3 = files.get_s3()
+    try:
+        s3.head_bucket(Bucket=files.S3_BUCKET)
+    except ClientError:
+        s3.create_bucket(Bucket=files.S3_BUCKET)
+
+    migrate(engine)
+    user_id = str(uuid.uuid4())
+    docs = {  # key suffix -> (table, label, file_name, content or None if never uploaded)
+        "a.pdf": ("resume", "Main résumé", "resume.pdf", os.urandom(args.size_mb * 1024 * 1024)),
+        "b.pdf": ("resume", "Main résumé", "other.pdf", b"%PDF-1.4 second"),
+        "c.docx": ("cv", None, "cover letter.docx", b"PK docx bytes"),
+        "gone.pdf": ("resume", None, "gone.pdf", None),
+    }
+    t0 = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User).values(user_id=user_id, email=f"{user_id}@example.com"))
+        for i, (suffix, (table, label, file_name, content)) in enumerate(docs.items()):
+            key = f"{user_id}/{suffix}"
+            if content is not None:
+                s3.put_object(Bucket=files.S3_BUCKET, Key=key, Body=content)
+            url = files.public_url_for(key)
+            row = {"user_id": user_id, "label": label, "file_name": file_name,
+                   "uploaded_at": t0 + timedelta(seconds=i)}
+            if table == "resume":
+                conn.execute(insert(models.Resume).values(resume_url=url, **row))
+            else:
+                conn.execute(insert(models.CV).values(cv_url=url, **row))
+
+    r = TestClient(app).get("/files/archive", headers={"Authorization": f"Bearer {user_id}"})
+    r.raise_for_status()
+    archive = zipfile.ZipFile(io.BytesIO(r.content))
+    expected = {
+        "resumes/Main r_sum_.pdf": docs["a.pdf"][3],
+        "resumes/Main r_sum_ (2).pdf": docs["b.pdf"][3],
+        "cover-letters/cover letter.docx": docs["c.docx"][3],
+    }
+
+    failures = []
+    if archive.testzip() is not None:
+        failures.append("CRC mismatch")
+    for name, content in expected.items():
+        if name not in archive.namelist():
+            failures.append(f"missing entry {name!r} (have {archive.namelist()})")
+        elif archive.read(name) != content:
+            failures.append(f"content mismatch in {name!r}")
+    if b"gone.pdf" not in archive.read("MISSING.txt"):
+        failures.append("MISSING.txt does not list gone.pdf")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(archive.namelist())} entries, {len(r.content)} bytes, {len(failures)} failure(s).")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+# scripts/check_query_budgets.py
+"""
+Fail if any endpoint issues more SQL statements than its declared budget.
+
+Every route of the applications, notes, files and users routers has an entry
+in BUDGETS; a route without one fails the check, and so does a budgeted route
+the script never calls, so a new endpoint can't land without a budget. Each
+call runs through the real app and counts the statements sent on both engines
+(the async one the routers use and the sync one behind `get_db`, exports and
+imports), printing their text whenever a budget is exceeded:
+
+    DATABASE_URL=... AUTH_MODE=dev-noverify python scripts/check_query_budgets.py [-v]
+
+Budgets are for a warm principal cache, so `get_current_user_id` costs
+nothing; a cold one costs AUTH_MISS more, checked once. Writes to rows the
+user doesn't own must 404 after NOT_OWNED statements, and a 304 may cost no
+more than NOT_MODIFIED. Background verification and purging are switched off
+so their statements can't land in a request's count. No request reaches S3:
+uploads are marked verified directly, and presigning is local (dummy
+credentials are used if none are configured).
+"""
+import argparse, os, sys, uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("AUTH_MODE", "dev-noverify")
+os.environ["VERIFY_MODE"] = "sweep"
+os.environ["PURGE_MODE"] = "scheduled"
+os.environ.setdefault("S3_BUCKET_NAME", "query-budget-check")
+os.environ.setdefault("S3_REGION", "us-east-1")
+if not (os.getenv("AWS_ACCESS_KEY_ID") or os.getenv("AWS_PROFILE")):
+    os.environ.update(AWS_ACCESS_KEY_ID="check", AWS_SECRET_ACCESS_KEY="check")
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, update
+
+from app import models, verification
+from app.db import async_session_factory, engine
+from app.main import app
+from app.migrations import migrate
+from app.routers import applications, files, notes, users
+
+# (method, route) -> statements per call. Writes are one ownership-scoped
+# statement with RETURNING, plus the stats-rollup upsert when status counts
+# change, a tombstone for deletes, and the data-version bump.
+BUDGETS = {
+    # Reads: the data-version lookup (ETag / 304 / cache key), then one query
+    ("GET", "/applications"): 2,
+    ("GET", "/applications/facets"): 2,
+    ("GET", "/applications/stats"): 1,
+    ("GET", "/applications/changes"): 4,  # version, applications, notes, tombstones
+    ("GET", "/applications/export"): 2,   # applications, then their notes in one IN-load
+    ("GET", "/applications/{application_id}"): 1,
+    ("GET", "/applications/{application_id}/detail"): 3,  # + the notes IN-load
+    ("GET", "/applications/{application_id}/notes"): 3,   # + the ownership check
+    # Writes
+    ("POST", "/applications"): 3,
+    ("PATCH", "/applications/{application_id}"): 3,
+    ("POST", "/applications/{application_id}/move"): 3,
+    ("DELETE", "/applications/{application_id}"): 4,
+    ("POST", "/applications/import"): 5,  # resume/CV ids to validate links, bump, one INSERT per batch, rollup
+    ("POST", "/applications/bulk-move"): 3,  # per chunk
+    ("POST", "/applications/bulk-delete"): 4,  # per chunk
+    ("POST", "/applications/bulk-update"): 3,  # one UPDATE ... FROM (VALUES ...)
+    ("POST", "/applications/{application_id}/notes"): 2,
+    ("PATCH", "/applications/{application_id}/notes/{note_id}"): 2,
+    ("DELETE", "/applications/{application_id}/notes/{note_id}"): 3,
+    # Files: presigning only signs; the rest are one query per table touched
+    ("POST", "/files/presign"): 0,
+    ("GET", "/files/presign-get"): 1,
+    ("POST", "/files/presign-get/batch"): 2,
+    ("GET", "/files/archive"): 2,
+    ("POST", "/files/resumes"): 3,  # insert, bump, refresh
+    ("GET", "/files/resumes"): 2,
+    ("DELETE", "/files/resumes/{resume_id}"): 5,  # load, detach applications, delete, bump, purge job
+    ("POST", "/files/cv"): 3,
+    ("GET", "/files/cv"): 2,
+    ("DELETE", "/files/cv/{cv_id}"): 5,
+    # Users
+    ("GET", "/users/me"): 1,
+    ("DELETE", "/users/me"): 2,  # the cascading delete, then the purge job
+}
+# SQLite can't RETURNING from the self-join that yields the old status, so
+# status-changing updates read it first, and bulk-update falls back to one
+# UPDATE per row (the call below patches two rows, one of them its status)
+SQLITE_EXTRA = {
+    ("PATCH", "/applications/{application_id}"): 1,
+    ("POST", "/applications/{application_id}/move"): 1,
+    ("POST", "/applications/bulk-move"): 1,
+    ("POST", "/applications/bulk-update"): 2,
+}
+NOT_OWNED = 2  # the bump every write takes first, then the ownership-scoped write (rolled back)
+NOT_MODIFIED = 1  # a 304 is answered from the data version alone
+AUTH_MISS = 1
+CHECKED_ROUTERS = (applications.router, notes.router, files.router, users.router)
+
+
+class QueryLog:
+    """Statements sent on both engines between `start()` and `stop()`."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+        self._active = False
+        for sync_engine in (engine, async_session_factory().kw["bind"].sync_engine):
+            event.listen(sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, *args):
+        if self._active:
+            self.statements.append(statement)
+
+    def start(self) -> None:
+        self.statements.clear()
+        self._active = True
+
+    def stop(self) -> list[str]:
+        self._active = False
+        return self.statements
+
+
+class Checker:
+    def __init__(self, log: QueryLog, dialect: str, verbose: bool):
+        self.log = log
+        self.extra = SQLITE_EXTRA if dialect == "sqlite" else {}
+        self.verbose = verbose
+        self.covered: set[tuple[str, str]] = set()
+        self.failures: list[str] = []
+
+    def call(self, c: TestClient, method: str, route: str, url: str, expect: int,
+             budget: int | None = None, label: str = "", **kwargs):
+        if budget is None and (method, route) in BUDGETS:
+            budget = BUDGETS[(method, route)] + self.extra.get((method, route), 0)
+            self.covered.add((method, route))
+        self.log.start()
+        r = c.request(method, url, **kwargs)
+        r.read()  # streamed bodies run their queries while being read
+        used = len(self.log.stop())
+        # A route without a budget is reported once, by the sweep at the end
+        ok = r.status_code == expect and (budget is None or used <= budget)
+        name = f"{method:<6} {route}" + (f" ({label})" if label else "")
+        limit = "?" if budget is None else budget
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<62} HTTP {r.status_code} {used}/{limit} statement(s)")
+        if not ok:
+            self.failures.append(name)
+        if not ok or self.verbose:
+            for sql in self.log.statements:
+                print("       " + " ".join(sql.split())[:160])
+        return r
+
+
+def user() -> str:
+    user_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(insert(models.User).values(user_id=user_id, email=f"{user_id}@example.com"))
+    return user_id
+
+
+def client_for(user_id: str) -> TestClient:
+    c = TestClient(app, headers={"Authorization": f"Bearer {user_id}"})
+    c.get("/auth/me")  # warm the principal cache
+    return c
+
+
+def uploaded_url(user_id: str, name: str) -> str:
+    return files.public_url_for(files.object_key_for(user_id, name))
+
+
+def mark_verified(model, id_col, item_id: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(update(model).where(id_col == item_id).values(upload_status=verification.VERIFIED))
+
+
+def clear_status(application_id: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            update(models.Application).where(models.Application.application_id == application_id).values(status=None)
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check every endpoint stays within its SQL statement budget.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every call's statements")
+    args = parser.parse_args()
+
+    migrate(engine)
+
+    log = QueryLog()
+    check = Checker(log, engine.dialect.name, args.verbose)
+    user_id, other_id = user(), user()
+    client, other = client_for(user_id), client_for(other_id)
+
+    # Authentication on a cold principal cache: one lookup on top of the route's own statements
+    cold_id = user()
+    check.call(TestClient(app, headers={"Authorization": f"Bearer {cold_id}"}), "GET",
+               "/applications/facets", "/applications/facets", 200,
+               budget=BUDGETS[("GET", "/applications/facets")] + AUTH_MISS, label="cold auth")
+
+    # Applications: writes
+    A = "/applications/{application_id}"
+    aid = check.call(client, "POST", "/applications", "/applications", 201,
+                     json={"company": "Acme", "status": "applied"}).json()["application_id"]
+    bid = check.call(client, "POST", "/applications", "/applications", 201,
+                     json={"company": "Beta"}).json()["application_id"]
+    check.call(client, "PATCH", A, f"/applications/{aid}", 200, json={"job_title": "Engineer"})
+    check.call(client, "PATCH", A, f"/applications/{aid}", 200, json={"status": "interviewing"}, label="status")
+    check.call(client, "POST", f"{A}/move", f"/applications/{aid}/move", 204, params={"new_status": "offer"})
+    check.call(client, "POST", "/applications/import", "/applications/import", 200,
+               content=b"company,status\nGamma,applied\nDelta,rejected\n", headers={"content-type": "text/csv"})
+    check.call(client, "POST", "/applications/bulk-update", "/applications/bulk-update", 200,
+               json={"items": [{"application_id": aid, "job_title": "Lead"},
+                               {"application_id": bid, "status": "interviewing"}]})
+    clear_status(aid)  # a legacy row without a status still serialises
+    check.call(client, "POST", "/applications/bulk-update", "/applications/bulk-update", 200,
+               json={"items": [{"application_id": aid, "job_title": "Lead"}]}, label="null status")
+    check.call(client, "POST", "/applications/bulk-move", "/applications/bulk-move", 200,
+               json={"ids": [aid, bid], "status": "applied"})
+    check.call(client, "POST", "/applications/bulk-move", "/applications/bulk-move", 200,
+               json={"filter": {"q": "Gamma"}, "status": "offer"}, label="filter")
+
+    # Notes
+    N = f"{A}/notes/{{note_id}}"
+    nid = check.call(client, "POST", f"{A}/notes", f"/applications/{aid}/notes", 201,
+                     json={"content": "called"}).json()["note_id"]
+    check.call(client, "POST", f"{A}/notes", f"/applications/{aid}/notes", 201, json={"content": "again"})
+    check.call(client, "PATCH", N, f"/applications/{aid}/notes/{nid}", 200, json={"content": "called back"})
+
+    # Applications: reads (with rows and notes to load), and their 304s
+    r = check.call(client, "GET", "/applications", "/applications", 200)
+    check.call(client, "GET", "/applications", "/applications", 304, budget=NOT_MODIFIED,
+               headers={"If-None-Match": r.headers["etag"]}, label="304")
+    r = check.call(client, "GET", "/applications", "/applications?limit=2&sort_by=company", 200, label="page")
+    check.call(client, "GET", "/applications", f"/applications?limit=2&sort_by=company&cursor="
+               f"{r.headers[applications.CURSOR_HEADER]}", 200, label="next page")
+    check.call(client, "GET", "/applications", "/applications?q=acme&sort_by=relevance", 200, label="search")
+    check.call(client, "GET", "/applications/facets", "/applications/facets?q=a", 200)
+    check.call(client, "GET", "/applications/stats", "/applications/stats", 200)
+    cursor = check.call(client, "GET", "/applications/changes", "/applications/changes", 200).json()["cursor"]
+    check.call(client, "GET", "/applications/export", "/applications/export", 200)
+    check.call(client, "GET", "/applications/export", "/applications/export?format=ndjson", 200, label="ndjson")
+    check.call(client, "GET", A, f"/applications/{aid}", 200)
+    check.call(client, "GET", f"{A}/detail", f"/applications/{aid}/detail", 200)
+    r = check.call(client, "GET", f"{A}/notes", f"/applications/{aid}/notes", 200)
+    check.call(client, "GET", f"{A}/notes", f"/applications/{aid}/notes", 304, budget=NOT_MODIFIED,
+               headers={"If-None-Match": r.headers["etag"]}, label="304")
+
+    # Writes to another user's rows: one statement, then 404
+    for method, route, url, kwargs in (
+        ("PATCH", A, f"/applications/{aid}", {"json": {"job_title": "x"}}),
+        ("POST", f"{A}/move", f"/applications/{aid}/move", {"params": {"new_status": "offer"}}),
+        ("DELETE", A, f"/applications/{aid}", {}),
+        ("POST", f"{A}/notes", f"/applications/{aid}/notes", {"json": {"content": "x"}}),
+        ("PATCH", N, f"/applications/{aid}/notes/{nid}", {"json": {"content": "x"}}),
+        ("DELETE", N, f"/applications/{aid}/notes/{nid}", {}),
+    ):
+        check.call(other, method, route, url, 404, budget=NOT_OWNED, label="not owned", **kwargs)
+
+    # Files: register uploads, settle them as if S3 had verified them, then read
+    R, V = "/files/resumes/{resume_id}", "/files/cv/{cv_id}"
+    check.call(client, "POST", "/files/presign", "/files/presign", 200,
+               params={"filename": "r.pdf", "content_type": "application/pdf"})
+    rid = check.call(client, "POST", "/files/resumes", "/files/resumes", 201,
+                     json={"file_name": "r.pdf", "url": uploaded_url(user_id, "r.pdf")}).json()["resume_id"]
+    vid = check.call(client, "POST", "/files/cv", "/files/cv", 201,
+                     json={"file_name": "c.pdf", "url": uploaded_url(user_id, "c.pdf")}).json()["cv_id"]
+    check.call(client, "POST", "/files/resumes", "/files/resumes", 422, budget=0, label="prefix url",
+               json={"file_name": "r.pdf", "url": files.public_url_for(f"{user_id}/")})
+    # (archived while still pending, so streaming it doesn't fetch the objects)
+    check.call(client, "GET", "/files/archive", "/files/archive", 200)
+    mark_verified(models.Resume, models.Resume.resume_id, rid)
+    mark_verified(models.CV, models.CV.cv_id, vid)
+    check.call(client, "PATCH", A, f"/applications/{aid}", 200, json={"resume_id": rid, "cv_id": vid}, label="link files")
+    check.call(client, "GET", "/files/resumes", "/files/resumes", 200)
+    check.call(client, "GET", "/files/cv", "/files/cv", 200)
+    check.call(client, "GET", "/files/presign-get", "/files/presign-get", 200, params={"kind": "resume", "item_id": rid})
+    check.call(client, "POST", "/files/presign-get/batch", "/files/presign-get/batch", 200,
+               json={"items": [{"kind": "resume", "item_id": rid}, {"kind": "cv", "item_id": vid}]})
+    check.call(client, "GET", f"{A}/detail", f"/applications/{aid}/detail", 200,
+               params={"presign": "inline"}, label="presign")
+
+    # Deletes (incremental sync sees the tombstones)
+    check.call(client, "DELETE", N, f"/applications/{aid}/notes/{nid}", 204)
+    check.call(client, "DELETE", R, f"/files/resumes/{rid}", 204)
+    check.call(client, "DELETE", V, f"/files/cv/{vid}", 204)
+    check.call(client, "DELETE", A, f"/applications/{bid}", 204)
+    check.call(client, "POST", "/applications/bulk-delete", "/applications/bulk-delete", 200,
+               json={"filter": {"q": "Gamma"}})
+    check.call(client, "GET", "/applications/changes", "/applications/changes", 200,
+               params={"since": cursor}, label="delta")
+
+    # Users
+    check.call(client, "GET", "/users/me", "/users/me", 200)
+    gone = client_for(user())
+    check.call(gone, "DELETE", "/users/me", "/users/me", 204, params={"confirm": "true"})
+    # The cached principal went with the account: the next request looks the user up, and fails
+    check.call(gone, "GET", "/auth/me", "/auth/me", 401, budget=AUTH_MISS, label="deleted user")
+
+    # Every route of the checked routers needs a budget, and every budget a call
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or not route.path.startswith(tuple(r.prefix for r in CHECKED_ROUTERS)):
+            continue
+        for method in route.methods - {"HEAD", "OPTIONS"}:
+            if (method, route.path) not in BUDGETS:
+                check.failures.append(f"{method} {route.path}: no budget")
+                print(f"FAIL {method:<6} {route.path}  no budget declared")
+    for method, route in BUDGETS.keys() - check.covered:
+        check.failures.append(f"{method} {route}: not exercised")
+        print(f"FAIL {method:<6} {route}  budget declared but never called")
+
+    print(f"{len(check.failures)} failure(s).")
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# scripts/check_query_plans.py
+"""
+Fail if any router query falls back to a sequential scan at scale.
+
+Seeds a Postgres database with many users' worth of data, drives every
+DB-backed endpoint through the real app (capturing the SQL it emits), then
+runs EXPLAIN on each captured statement and reports plans that Seq Scan one
+of the application tables. Keyset pages far into the list are also run under
+EXPLAIN ANALYZE, and fail if the scan filtered out more rows than a page
+holds (the cursor didn't become an index bound, so page N reads pages 1..N-1).
+Exit status is non-zero on any violation.
+
+    DATABASE_URL=postgresql://... AUTH_MODE=dev-noverify \
+        python scripts/check_query_plans.py [--users 200] [--apps-per-user 250]
+
+Point it at a disposable database: it creates and migrates the schema, and
+inserts synthetic rows.
+"""
+import argparse, asyncio, os, random, re, sys, uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("AUTH_MODE", "dev-noverify")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from app import models
+from app.db import async_session_factory, engine
+from app.main import app
+from app.migrations import migrate
+
+WATCHED = ("application", "application_notes", "resumes", "cv", "users")
+STATUSES = ["applied", "interviewing", "offer", "rejected"]
+PAGE_SIZE = 20
+DEEP_PAGES = 8
+
+
+def seed(n_users: int, apps_per_user: int) -> list[str]:
+    user_ids = [str(uuid.uuid4()) for _ in range(n_users)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"user_id": uid, "email": f"{uid}@example.com"} for uid in user_ids
+        ])
+        for uid in user_ids:
+            resumes = [{"resume_id": str(uuid.uuid4()), "user_id": uid,
+                        "resume_url": f"https://bucket/{uid}/{i}.pdf", "file_name": f"r{i}.pdf"} for i in range(3)]
+            cvs = [{"cv_id": str(uuid.uuid4()), "user_id": uid,
+                    "cv_url": f"https://bucket/{uid}/c{i}.pdf", "file_name": f"c{i}.pdf"} for i in range(3)]
+            apps = [{
+                "application_id": str(uuid.uuid4()), "user_id": uid,
+                "company": f"Company {random.randint(1, 5000)}",
+                "job_title": random.choice(["Engineer", "Analyst", "Designer", "Manager"]),
+                "job_description": "Responsibilities include " + " ".join(random.choices(
+                    ["python", "sql", "aws", "react", "design", "testing", "support"], k=40)),
+                "status": random.choice(STATUSES),
+                "applied_date": random.choice([None] + [date(2024, 1, 1) + timedelta(days=d) for d in range(600)]),
+                "resume_id": random.choice(resumes)["resume_id"],
+                "cv_id": random.choice(cvs)["cv_id"],
+            } for _ in range(apps_per_user)]
+            notes = [{"note_id": str(uuid.uuid4()), "application_id": a["application_id"],
+                      "user_id": uid, "content": "follow up"} for a in apps for _ in range(2)]
+            conn.execute(insert(models.Resume), resumes)
+            conn.execute(insert(models.CV), cvs)
+            conn.execute(insert(models.Application), apps)
+            conn.execute(insert(models.ApplicationNote), notes)
+        conn.exec_driver_sql("ANALYZE")
+    return user_ids
+
+
+def walk(client: TestClient, user_id: str, sort_by: str, order: str, pages: int) -> None:
+    """Follow the list's cursor `pages` pages deep."""
+    h = {"Authorization": f"Bearer {user_id}"}
+    params = {"sort_by": sort_by, "order": order, "limit": PAGE_SIZE}
+    for _ in range(pages):
+        r = client.get("/applications", headers=h, params=params)
+        if not r.headers.get("X-Next-Cursor"):
+            return
+        params["cursor"] = r.headers["X-Next-Cursor"]
+
+
+def exercise(client: TestClient, user_id: str) -> None:
+    """Hit every DB-backed endpoint once (S3-touching writes excluded)."""
+    h = {"Authorization": f"Bearer {user_id}"}
+    apps = client.get("/applications", headers=h, params={"limit": 20}).json()
+    for sort_by in ("created_at", "applied_date", "company", "status"):
+        for order in ("asc", "desc"):
+            r = client.get("/applications", headers=h, params={"sort_by": sort_by, "order": order, "limit": 20})
+            cursor = r.headers.get("X-Next-Cursor")
+            client.get("/applications", headers=h, params={"sort_by": sort_by, "order": order, "limit": 20, "cursor": cursor})
+    client.get("/applications", headers=h, params={"q": "python", "sort_by": "relevance", "limit": 20})
+    client.get("/applications", headers=h, params={"q": "Compan", "status_eq": "offer", "limit": 20})
+
+    app_id = apps[0]["application_id"]
+    client.get(f"/applications/{app_id}", headers=h)
+    client.patch(f"/applications/{app_id}", headers=h, json={"job_title": "Senior Engineer"})
+    client.post(f"/applications/{app_id}/move", headers=h, params={"new_status": "interviewing"})
+    client.post("/applications/bulk-move", headers=h, json={"ids": [a["application_id"] for a in apps[:5]], "status": "offer"})
+
+    note = client.post(f"/applications/{app_id}/notes", headers=h, json={"content": "hello"}).json()
+    client.get(f"/applications/{app_id}/notes", headers=h)
+    client.patch(f"/applications/{app_id}/notes/{note['note_id']}", headers=h, json={"content": "edited"})
+    client.delete(f"/applications/{app_id}/notes/{note['note_id']}", headers=h)
+
+    resumes = client.get("/files/resumes", headers=h).json()
+    client.get("/files/cv", headers=h)
+    client.get("/files/presign-get", headers=h, params={"kind": "resume", "item_id": resumes[0]["resume_id"]})
+
+    client.post("/applications/bulk-delete", headers=h, json={"ids": [a["application_id"] for a in apps[5:8]]})
+    client.delete(f"/applications/{apps[8]['application_id']}", headers=h)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--apps-per-user", type=int, default=250)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("check_query_plans needs a Postgres DATABASE_URL", file=sys.stderr)
+        return 2
+
+    migrate(engine)
+    user_ids = seed(args.users, args.apps_per_user)
+
+    async_engine = async_session_factory().kw["bind"]
+    captured: list[tuple[str, object, bool]] = []  # (statement, parameters, deep page)
+    deep = False
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        head = statement.lstrip().split(None, 1)[0].upper()
+        if head in ("SELECT", "UPDATE", "DELETE", "INSERT") and not executemany:
+            captured.append((statement, parameters, deep))
+
+    # The routers run on the async engine; its statements are explained on it too
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        client, user_id = TestClient(app), random.choice(user_ids)
+        exercise(client, user_id)
+        deep = True
+        for sort_by in ("applied_date", "company"):
+            for order in ("asc", "desc"):
+                walk(client, user_id, sort_by, order, DEEP_PAGES)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+    failures = asyncio.run(explain(async_engine, captured))
+    print(f"{len(captured)} statements explained, {failures} failure(s)")
+    return 1 if failures else 0
+
+
+async def explain(async_engine, captured) -> int:
+    failures = 0
+    await async_engine.dispose(close=False)  # its pooled connections belong to the TestClient's loop
+    async with async_engine.connect() as conn:
+        for statement, parameters, deep in captured:
+            analyze = deep and statement.lstrip().upper().startswith("SELECT")
+            prefix = "EXPLAIN ANALYZE " if analyze else "EXPLAIN "
+            plan = "\n".join(row[0] for row in await conn.exec_driver_sql(prefix + statement, parameters))
+            bad = [t for t in WATCHED if f"Seq Scan on {t} " in plan + " "]
+            if bad:
+                failures += 1
+                print(f"SEQ SCAN on {', '.join(bad)}:\n  {statement}\n{plan}\n")
+            removed = sum(int(n) for n in re.findall(r"Rows Removed by Filter: (\d+)", plan))
+            if analyze and removed > PAGE_SIZE:
+                failures += 1
+                print(f"DEEP PAGE filtered {removed} row(s) instead of seeking:\n  {statement}\n{plan}\n")
+        await conn.rollback()
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(main())